@@ -0,0 +1,49 @@
+# Micro-benchmark for the public-route matcher in gateway/auth.py.
+#
+# Run from gateway-service/:  python -m benchmarks.bench_public_routes
+#
+# Compares the compiled route trie against the previous per-request
+# re.sub/re.match scan while the route table grows.
+import re
+import timeit
+
+from gateway.auth import PUBLIC_ENDPOINTS
+from gateway.routes import RouteTable
+
+
+TABLE_SIZES = (len(PUBLIC_ENDPOINTS), 100, 300, 600)
+LOOKUPS = 2000
+
+
+def legacy_is_public(endpoints: dict, path: str, method: str) -> bool:
+    for public_path, allowed_methods in endpoints.items():
+        pattern = re.sub(r'\{[^}]+\}', '[^/]+', public_path)
+        if re.match(pattern + '$', path):
+            return method.upper() in [m.upper() for m in allowed_methods]
+    return False
+
+
+def build_table(size: int) -> dict:
+    endpoints = dict(PUBLIC_ENDPOINTS)
+    index = 0
+    while len(endpoints) < size:
+        endpoints[f'/svc{index}/api/items/{{item_id}}/children/{{child_id}}'] = ['GET']
+        endpoints[f'/svc{index}/api/items/'] = ['GET', 'POST']
+        index += 1
+    return endpoints
+
+
+def main():
+    # A protected path misses every route, which is the worst case for a linear scan
+    path = '/order/api/orders/123e4567-e89b-12d3-a456-426614174000/'
+    print(f'{"routes":>8} {"legacy us/op":>14} {"trie us/op":>12}')
+    for size in TABLE_SIZES:
+        endpoints = build_table(size)
+        routes = RouteTable({template: frozenset(methods) for template, methods in endpoints.items()})
+        legacy = timeit.timeit(lambda: legacy_is_public(endpoints, path, 'GET'), number=LOOKUPS)
+        compiled = timeit.timeit(lambda: routes.match(path), number=LOOKUPS)
+        print(f'{len(endpoints):>8} {legacy / LOOKUPS * 1e6:>14.2f} {compiled / LOOKUPS * 1e6:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,5 +3,9 @@ set -e
 
 echo "Starting FastAPI entrypoint..."
 
+# Traefik reaches the gateway over the Docker network. X-Forwarded-For is only trusted
+# from those addresses, so anonymous rate limits key on the real client, not on Traefik.
+FORWARDED_ALLOW_IPS="${FORWARDED_ALLOW_IPS:-10.0.0.0/8,172.16.0.0/12,192.168.0.0/16}"
+
 # Start FastAPI
-exec uvicorn gateway.main:app --host 0.0.0.0 --port ${PORT} --proxy-headers
\ No newline at end of file
+exec uvicorn gateway.main:app --host 0.0.0.0 --port ${PORT} --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS}"
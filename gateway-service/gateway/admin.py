@@ -0,0 +1,23 @@
+# gateway/admin.py
+import hmac
+import os
+from dotenv import load_dotenv
+from fastapi import Request, HTTPException, status
+
+
+load_dotenv()
+
+# Shared secret for the gateway's own admin endpoints (cache purge, upstream reload,
+# internal stats), sent in ADMIN_TOKEN_HEADER on top of the usual user token. Access
+# tokens carry no role, so those endpoints refuse every request while it is unset.
+ADMIN_TOKEN = os.getenv('GATEWAY_ADMIN_TOKEN')
+ADMIN_TOKEN_HEADER = 'x-gateway-admin-token'
+
+
+def require_admin(request: Request):
+    supplied = request.headers.get(ADMIN_TOKEN_HEADER, '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required."
+        )
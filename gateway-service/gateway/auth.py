@@ -1,6 +1,8 @@
+import asyncio
+import hashlib
 import os
+import time
 import httpx
-import re
 from datetime import datetime, timedelta, timezone
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
@@ -9,8 +11,20 @@ from dotenv import load_dotenv
 from typing import Set
 
 from .services import SERVICE_URLS
+from .routes import RouteTable
+from .metrics import register_route_templates, JWT_VERIFY_DURATION, BLACKLIST_CHECK_DURATION
 from .logging import logger
+from .tracing import inject
+from .clients import service_clients
+from .rate_limit import rate_limiter
 from .redis_client import redis_client
+from .token_cache import token_cache, hash_token
+from .blacklist_filter import (
+    revoked_filter,
+    BLACKLIST_KEY_PREFIX,
+    LEGACY_BLACKLIST_KEY,
+    BLACKLIST_CHANNEL,
+)
 
 
 load_dotenv()
@@ -45,13 +59,19 @@ PUBLIC_ENDPOINTS = {
     '/shop/api/media/{shop_slug}/': ['GET'],
     '/shop/api/social-media/{shop_slug}/': ['GET'],
 
+    # Gateway endpoints, sub-requests are authorized one by one
+    '/batch': ['POST'],
+
     # Product endpoints
     '/product/': ['GET'],
     '/product/api/categories/': ['GET'],
     '/product/api/categories/{category_id}': ['GET'],
     '/product/api/products/': ['GET'],
+    '/product/api/products/search/': ['GET'],
     '/product/api/products/{product_id}': ['GET'],
+    '/product/api/products/{product_id}/full': ['GET'],
     '/product/api/products/{product_id}/variations/': ['GET'],
+    '/product/api/products/{product_id}/variations/ratings/': ['GET'],
     '/product/api/products/{product_id}/variations/{variation_id}': ['GET'],
     '/product/api/products/variations/{variation_id}': ['GET'],
     '/product/api/products/variations/{variation_id}/images/': ['GET'],
@@ -59,6 +79,13 @@ PUBLIC_ENDPOINTS = {
 }
 
 
+_PUBLIC_PATH_SET = frozenset(PUBLIC_PATHS)
+register_route_templates(PUBLIC_ENDPOINTS)
+_PUBLIC_ROUTES = RouteTable({
+    template: frozenset(m.upper() for m in methods) for template, methods in PUBLIC_ENDPOINTS.items()
+})
+
+
 JWT_SECRET = os.getenv('JWT_SECRET')
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM')
 HEADER = 'Bearer'
@@ -67,28 +94,81 @@ REFRESH_TOKEN_LIFETIME_DAYS = int(os.getenv('REFRESH_TOKEN_LIFETIME_DAYS', 7))
 
 BLACKLISTED_TOKENS: Set[str] = set()
 
+# Logins waiting on the user service's password check at once; the rest wait up to
+# LOGIN_QUEUE_TIMEOUT seconds for a slot and are turned away after that
+LOGIN_CONCURRENCY = int(os.getenv('GATEWAY_LOGIN_CONCURRENCY', 32))
+LOGIN_QUEUE_TIMEOUT = float(os.getenv('GATEWAY_LOGIN_QUEUE_TIMEOUT', 2.0))
+# Attempts per account, on top of the per-client limit in rate_limit.RATE_LIMITS
+LOGIN_ACCOUNT_LIMIT = {
+    'rate': float(os.getenv('GATEWAY_LOGIN_ACCOUNT_RATE', 0.05)),
+    'burst': int(os.getenv('GATEWAY_LOGIN_ACCOUNT_BURST', 5)),
+}
+LOGIN_ACCOUNT_TEMPLATE = 'login-account'
+# RSA/ECDSA signing takes long enough to stall every other request on the event loop
+ASYMMETRIC_ALGORITHM = (JWT_ALGORITHM or '')[:2] in ('RS', 'ES', 'PS')
 
-def add_to_blacklist(token: str):
-    redis_client.sadd("blacklisted_tokens", token)
+login_slots = asyncio.BoundedSemaphore(LOGIN_CONCURRENCY)
 
 
-def is_token_blacklisted(token: str) -> bool:
-    return redis_client.sismember("blacklisted_tokens", token)
+def _blacklist_key(digest: bytes) -> str:
+    return BLACKLIST_KEY_PREFIX + digest.hex()
+
+
+def _blacklist_ttl(token: str) -> int:
+    # A revoked token only has to stay revoked until it would have expired anyway
+    max_ttl = REFRESH_TOKEN_LIFETIME_DAYS * 24 * 60 * 60
+    try:
+        exp = jwt.get_unverified_claims(token).get('exp')
+    except JWTError:
+        return max_ttl
+    if not isinstance(exp, (int, float)):
+        return max_ttl
+    return max(1, min(int(exp - time.time()) + 1, max_ttl))
+
+
+async def add_to_blacklist(*tokens: str):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for token in tokens:
+            digest = hash_token(token)
+            token_cache.invalidate_hash(digest)
+            revoked_filter.add(digest)
+            pipe.set(_blacklist_key(digest), 1, ex=_blacklist_ttl(token))
+            # Other workers add it to their filter and drop it from their JWT cache
+            pipe.publish(BLACKLIST_CHANNEL, digest.hex())
+        await pipe.execute()
+
+
+async def is_token_blacklisted(token: str) -> bool:
+    digest = hash_token(token)
+    if not revoked_filter.might_contain(digest):
+        return False
+
+    with BLACKLIST_CHECK_DURATION.time():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(_blacklist_key(digest))
+            # Revocations written before per-token keys existed; nothing adds to this set
+            # anymore and it can be deleted once REFRESH_TOKEN_LIFETIME_DAYS have passed.
+            pipe.sismember(LEGACY_BLACKLIST_KEY, token)
+            revoked, legacy_revoked = await pipe.execute()
+    revoked = bool(revoked or legacy_revoked)
+    revoked_filter.record_redis_result(revoked)
+    return revoked
 
 
 def is_endpoint_public(path: str, method: str) -> bool:
-    if any(path == p or path.startswith(p + '/') for p in PUBLIC_PATHS):
+    if path in _PUBLIC_PATH_SET:
         return True
-    
-    for public_path, allowed_methods in PUBLIC_ENDPOINTS.items():
-        pattern = re.sub(r'\{[^}]+\}', '[^/]+', public_path)
-        
-        if re.match(pattern + '$', path):
-            if method.upper() in [m.upper() for m in allowed_methods]:
-                return True
-            return False
-    
-    return False
+
+    # Same as `path.startswith(p + '/')` for every public path, but only looks at
+    # the prefixes of this path so the cost does not grow with the table.
+    index = path.find('/', 1)
+    while index != -1:
+        if path[:index] in _PUBLIC_PATH_SET:
+            return True
+        index = path.find('/', index + 1)
+
+    route = _PUBLIC_ROUTES.match(path)
+    return route is not None and method.upper() in route[1]
 
 
 def create_access_token(payload: dict):
@@ -115,19 +195,32 @@ async def verify_jwt(request: Request):
         )
     
     token = auth_header.split(" ")[1]
+    start = time.perf_counter()
+
+    payload = token_cache.get(token)
+    if payload is not None:
+        request.state.user = payload
+        JWT_VERIFY_DURATION.observe(time.perf_counter() - start, 'cache_hit')
+        return payload
 
     try:
-        if is_token_blacklisted(token):
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked (logged out).")
+        blacklisted = await is_token_blacklisted(token)
     except Exception as e:
-        logger.error(f"Blacklist check failed: {e}")
+        logger.error('Blacklist check failed: %s', e)
+        blacklisted = False
+    if blacklisted:
+        JWT_VERIFY_DURATION.observe(time.perf_counter() - start, 'revoked')
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked (logged out).")
     
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        token_cache.put(token, payload)
         request.state.user = payload  
-        logger.info(f"JWT verified for user: {payload.get('sub')}")
+        logger.debug('JWT verified for user: %s', payload.get('sub'))
+        JWT_VERIFY_DURATION.observe(time.perf_counter() - start, 'verified')
         return payload
     except JWTError:
+        JWT_VERIFY_DURATION.observe(time.perf_counter() - start, 'invalid')
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is invalid or expired."
@@ -136,10 +229,43 @@ async def verify_jwt(request: Request):
     
 
 
+def _create_token_pair(sub: str) -> tuple[str, str]:
+    return create_access_token({'sub': sub}), create_refresh_token({'sub': sub})
+
+
+def _account_key(email: str) -> str:
+    # Emails are not written to Redis as they are
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
 async def handle_login(request):
-    body = await request.json()
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f'{SERVICE_URLS['user']}/api/user/login/', json=body)
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({'detail': 'Invalid JSON body'}, status_code=400)
+
+    email = body.get('email') if isinstance(body, dict) else None
+    if isinstance(email, str) and email:
+        limited = await rate_limiter.check_key(LOGIN_ACCOUNT_TEMPLATE, _account_key(email), LOGIN_ACCOUNT_LIMIT)
+        if limited is not None:
+            logger.warning('Login attempts throttled for an account')
+            return limited
+
+    try:
+        async with asyncio.timeout(LOGIN_QUEUE_TIMEOUT):
+            await login_slots.acquire()
+    except TimeoutError:
+        logger.warning('Login rejected, %d logins already in flight', LOGIN_CONCURRENCY)
+        return JSONResponse({'detail': 'Too many logins in progress'}, status_code=503, headers={'Retry-After': '1'})
+    try:
+        res = await service_clients.get('user').post(
+            f'{SERVICE_URLS['user']}/api/user/login/', json=body, headers=inject(),
+        )
+    except httpx.RequestError as e:
+        logger.error('Login request to user service failed: %s', e)
+        return JSONResponse({'detail': 'User service unavailable'}, status_code=503)
+    finally:
+        login_slots.release()
 
     if res.status_code != 200:
         return JSONResponse(res.json(), status_code=res.status_code)
@@ -149,8 +275,10 @@ async def handle_login(request):
     if not user_uuid:
         return JSONResponse({'detail': 'User UUID not returned'}, status_code=500)
 
-    access = create_access_token({'sub': str(user_uuid)})
-    refresh = create_refresh_token({'sub': str(user_uuid)})
+    if ASYMMETRIC_ALGORITHM:
+        access, refresh = await asyncio.to_thread(_create_token_pair, str(user_uuid))
+    else:
+        access, refresh = _create_token_pair(str(user_uuid))
     return JSONResponse({
         'access_token': access,
         'refresh_token': refresh,
@@ -174,10 +302,10 @@ async def handle_logout(request: Request):
         raise HTTPException(status_code=401, detail="Authorization header missing or invalid")
 
     access_token = auth_header.split(" ")[1]
-    add_to_blacklist(access_token)
-    
     if refresh_token:
-        add_to_blacklist(refresh_token)
+        await add_to_blacklist(access_token, refresh_token)
+    else:
+        await add_to_blacklist(access_token)
     
     return JSONResponse({
         "detail": "Successfully logged out"
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import math
+import os
+import time
+from fastapi import FastAPI, Depends
+
+from .services import SERVICE_URLS, SERVICE_UPSTREAMS, SERVICE_SETTINGS, parse_upstream_urls
+from .clients import service_clients
+from .admin import require_admin
+from .logging import logger
+
+
+ROUND_ROBIN = 'round_robin'
+LEAST_OUTSTANDING = 'least_outstanding'
+EWMA = 'ewma'
+STRATEGIES = (ROUND_ROBIN, LEAST_OUTSTANDING, EWMA)
+
+# Seconds over which older latency samples fade out of the EWMA
+EWMA_DECAY = float(os.getenv('GATEWAY_LB_EWMA_DECAY', 10.0))
+# Latency charged for a failed attempt, so fast connection errors do not attract traffic
+EWMA_FAILURE_PENALTY = float(os.getenv('GATEWAY_LB_FAILURE_PENALTY', 1.0))
+
+HEALTH_INTERVAL = float(os.getenv('GATEWAY_HEALTH_INTERVAL', 5.0))
+HEALTH_TIMEOUT = float(os.getenv('GATEWAY_HEALTH_TIMEOUT', 2.0))
+# Consecutive probe results needed to eject a replica or take it back
+HEALTH_FAILURES = int(os.getenv('GATEWAY_HEALTH_FAILURES', 2))
+HEALTH_SUCCESSES = int(os.getenv('GATEWAY_HEALTH_SUCCESSES', 2))
+
+# JSON object of service -> list of URLs (or a comma separated string). Re-read when
+# it changes, so replicas can be added or removed without restarting the gateway.
+UPSTREAMS_FILE = os.getenv('GATEWAY_UPSTREAMS_FILE')
+
+
+class Upstream:
+    __slots__ = (
+        'url', 'in_flight', 'requests', 'failures', 'ewma', 'updated_at',
+        'healthy', 'probe_failures', 'probe_successes', 'last_probe_error',
+    )
+
+    def __init__(self, url: str, ewma: float = 0.0):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.ewma = ewma
+        self.updated_at = time.monotonic()
+        self.healthy = True
+        self.probe_failures = 0
+        self.probe_successes = 0
+        self.last_probe_error = None
+
+    def observe(self, seconds: float):
+        now = time.monotonic()
+        weight = math.exp(-(now - self.updated_at) / EWMA_DECAY)
+        self.updated_at = now
+        # Peak-sensitive: a slow response is taken at face value, recovery decays in
+        self.ewma = seconds if seconds > self.ewma else self.ewma * weight + seconds * (1 - weight)
+
+    def cost(self) -> float:
+        return self.ewma * (self.in_flight + 1)
+
+    def stats(self) -> dict:
+        return {
+            'healthy': self.healthy,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ewma_ms': round(self.ewma * 1000, 2),
+            'probe_failures': self.probe_failures,
+            'last_probe_error': self.last_probe_error,
+        }
+
+
+class UpstreamBalancer:
+    def __init__(self, service: str, urls: list[str], strategy: str):
+        if strategy not in STRATEGIES:
+            logger.warning('Unknown load balancing strategy %r for %s, using %s', strategy, service, LEAST_OUTSTANDING)
+            strategy = LEAST_OUTSTANDING
+        self.service = service
+        self.strategy = strategy
+        self.upstreams = [Upstream(url) for url in urls]
+        self._cursor = 0
+
+    def update(self, urls: list[str]) -> bool:
+        # Replicas that stay keep their counters; in-flight calls to removed ones finish normally
+        current = {upstream.url: upstream for upstream in self.upstreams}
+        if list(current) == urls:
+            return False
+        known = [upstream.ewma for upstream in self.upstreams]
+        # New replicas start at the average so they neither attract nor miss every request
+        start_ewma = sum(known) / len(known) if known else 0.0
+        self.upstreams = [current.get(url) or Upstream(url, start_ewma) for url in urls]
+        logger.info('Upstreams for %s: %s', self.service, ', '.join(urls) or 'none')
+        return True
+
+    def pick(self, exclude: Upstream | None = None) -> Upstream | None:
+        upstreams = [upstream for upstream in self.upstreams if upstream.healthy]
+        if not upstreams:
+            # Every replica failing its probe is more likely a probe problem than an outage
+            upstreams = self.upstreams
+        if exclude is not None:
+            upstreams = [upstream for upstream in upstreams if upstream is not exclude]
+        count = len(upstreams)
+        if count <= 1:
+            return upstreams[0] if upstreams else None
+
+        start = self._cursor % count
+        self._cursor += 1
+        if self.strategy == ROUND_ROBIN:
+            return upstreams[start]
+        # Scan from the round-robin position so replicas with equal load take turns
+        key = (lambda upstream: upstream.in_flight) if self.strategy == LEAST_OUTSTANDING else Upstream.cost
+        return min((upstreams[(start + i) % count] for i in range(count)), key=key)
+
+    def acquire(self, upstream: Upstream):
+        upstream.in_flight += 1
+        upstream.requests += 1
+
+    def release(self, upstream: Upstream, success: bool | None, elapsed: float):
+        # success is None when the attempt was cancelled, e.g. the losing half of a hedge
+        upstream.in_flight -= 1
+        if success is None:
+            return
+        if success:
+            upstream.observe(elapsed)
+        else:
+            upstream.failures += 1
+            upstream.observe(max(elapsed, EWMA_FAILURE_PENALTY))
+
+    def record_probe(self, upstream: Upstream, error: str | None):
+        if error is None:
+            upstream.probe_failures = 0
+            upstream.probe_successes += 1
+            if not upstream.healthy and upstream.probe_successes >= HEALTH_SUCCESSES:
+                upstream.healthy = True
+                logger.info('Upstream %s for %s is healthy again', upstream.url, self.service)
+            return
+        upstream.probe_successes = 0
+        upstream.probe_failures += 1
+        upstream.last_probe_error = error
+        if upstream.healthy and upstream.probe_failures >= HEALTH_FAILURES:
+            upstream.healthy = False
+            logger.warning('Ejected upstream %s for %s: %s', upstream.url, self.service, error)
+
+    def stats(self) -> dict:
+        return {
+            'strategy': self.strategy,
+            'upstreams': {upstream.url: upstream.stats() for upstream in self.upstreams},
+        }
+
+
+service_balancers = {
+    service: UpstreamBalancer(service, urls, SERVICE_SETTINGS[service]['lb_strategy'])
+    for service, urls in SERVICE_UPSTREAMS.items()
+}
+
+
+class UpstreamMonitor:
+    def __init__(self):
+        self._task = None
+        self._file_mtime = None
+        self.probes = 0
+        self.reloads = 0
+
+    async def _probe(self, service: str, balancer: UpstreamBalancer, upstream: Upstream):
+        url = f'{upstream.url}{SERVICE_SETTINGS[service]['health_path']}'
+        try:
+            resp = await service_clients.get(service).get(url, timeout=HEALTH_TIMEOUT)
+            error = f'status {resp.status_code}' if resp.status_code >= 500 else None
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        self.probes += 1
+        balancer.record_probe(upstream, error)
+
+    async def probe_all(self):
+        # Single replicas are left to the circuit breaker, there is nothing to fail over to
+        await asyncio.gather(*[
+            self._probe(service, balancer, upstream)
+            for service, balancer in service_balancers.items() if len(balancer.upstreams) > 1
+            for upstream in balancer.upstreams
+        ])
+
+    def reload(self, force: bool = False) -> list[str]:
+        # Returns the services whose replica list changed
+        if not UPSTREAMS_FILE:
+            return []
+        try:
+            mtime = os.stat(UPSTREAMS_FILE).st_mtime
+            if not force and mtime == self._file_mtime:
+                return []
+            with open(UPSTREAMS_FILE) as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error('Could not read upstreams from %s: %s', UPSTREAMS_FILE, e)
+            return []
+        self._file_mtime = mtime
+
+        changed = []
+        for service, urls in config.items():
+            balancer = service_balancers.get(service)
+            if balancer is None:
+                logger.warning('Ignoring upstreams for unknown service %s', service)
+                continue
+            urls = parse_upstream_urls(urls) if isinstance(urls, str) else [url.rstrip('/') for url in urls]
+            if balancer.update(urls):
+                SERVICE_URLS[service] = urls[0] if urls else None
+                changed.append(service)
+        self.reloads += 1
+        return changed
+
+    async def _run(self):
+        while True:
+            try:
+                self.reload()
+                await self.probe_all()
+            except Exception as e:
+                logger.error('Upstream health check failed: %s', e)
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+upstream_monitor = UpstreamMonitor()
+
+
+def setup_balancer(app: FastAPI):
+    @app.on_event('startup')
+    async def start_upstream_monitor():
+        upstream_monitor.start()
+
+    @app.on_event('shutdown')
+    async def stop_upstream_monitor():
+        await upstream_monitor.stop()
+
+    @app.post('/gateway/upstreams/reload', include_in_schema=False, dependencies=[Depends(require_admin)])
+    async def reload_upstreams():
+        return {'changed': upstream_monitor.reload(force=True)}
+
+    @app.get('/gateway/stats/upstreams', include_in_schema=False, dependencies=[Depends(require_admin)])
+    async def upstream_stats():
+        return {
+            'probes': upstream_monitor.probes,
+            'reloads': upstream_monitor.reloads,
+            'services': {service: balancer.stats() for service, balancer in service_balancers.items()},
+        }
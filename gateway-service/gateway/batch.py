@@ -0,0 +1,140 @@
+# gateway/batch.py
+import asyncio
+import json
+import os
+from typing import Any, Literal
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from starlette.requests import Request as StarletteRequest
+
+from .auth import verify_jwt, is_endpoint_public
+from .admin import ADMIN_TOKEN_HEADER
+from .forward import forward_request, EXCLUDED_RAW_REQUEST_HEADERS
+from .rate_limit import rate_limiter
+from .compression import compress_response
+from .services import SERVICE_URLS
+from .logging import logger
+
+
+load_dotenv()
+
+BATCH_MAX_REQUESTS = int(os.getenv('GATEWAY_BATCH_MAX_REQUESTS', 20))
+# Sub-requests run concurrently per batch, and across all batches in this worker
+BATCH_CONCURRENCY = int(os.getenv('GATEWAY_BATCH_CONCURRENCY', 6))
+BATCH_TOTAL_CONCURRENCY = int(os.getenv('GATEWAY_BATCH_TOTAL_CONCURRENCY', 100))
+
+# Headers of the outer request that must not leak into sub-requests
+EXCLUDED_BATCH_HEADERS = {
+    b'content-length', b'content-type', b'transfer-encoding', b'if-none-match', b'accept-encoding',
+}
+# Headers a batch item may not set itself: hop-by-hop ones, those the gateway sets, and
+# credentials, which were only verified on the outer request
+EXCLUDED_ITEM_HEADERS = EXCLUDED_RAW_REQUEST_HEADERS | {
+    b'authorization', b'cookie', b'transfer-encoding', ADMIN_TOKEN_HEADER.encode('latin-1'),
+}
+
+_total_slots = asyncio.Semaphore(BATCH_TOTAL_CONCURRENCY)
+
+
+class BatchItem(BaseModel):
+    id: str | None = None
+    method: Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE'] = 'GET'
+    path: str
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Any = None
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem]
+
+
+def _build_subrequest(parent: Request, item: BatchItem, user: dict | None) -> StarletteRequest:
+    path, _, query = item.path.partition('?')
+    body = b'' if item.body is None else json.dumps(item.body).encode()
+
+    headers = [(k, v) for k, v in parent.scope['headers'] if k not in EXCLUDED_BATCH_HEADERS]
+    headers.extend(
+        (name, v.encode('latin-1')) for k, v in item.headers.items()
+        if (name := k.lower().encode('latin-1')) not in EXCLUDED_ITEM_HEADERS
+    )
+    if body:
+        headers.append((b'content-type', b'application/json'))
+        headers.append((b'content-length', str(len(body)).encode()))
+
+    scope = {
+        'type': 'http',
+        'http_version': parent.scope.get('http_version', '1.1'),
+        'method': item.method,
+        'scheme': parent.scope.get('scheme', 'http'),
+        'server': parent.scope.get('server'),
+        'client': parent.scope.get('client'),
+        'root_path': '',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': headers,
+        'state': {'user': user} if user else {},
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    return StarletteRequest(scope, receive)
+
+
+async def _response_body(response) -> bytes:
+    if hasattr(response, 'body_iterator'):
+        chunks = [chunk async for chunk in response.body_iterator]
+        if response.background is not None:
+            await response.background()
+        return b''.join(chunks)
+    return response.body
+
+
+async def _run_item(parent: Request, item: BatchItem, user: dict | None, slots: asyncio.Semaphore) -> dict:
+    result = {'id': item.id, 'path': item.path}
+    service, _, rest = item.path.lstrip('/').partition('/')
+    if service not in SERVICE_URLS:
+        return {**result, 'status': 400, 'body': {'error': 'Unknown service'}}
+
+    path = item.path.partition('?')[0]
+    if is_endpoint_public(path, item.method):
+        # Sent anonymously like the direct proxy would, so no user id reaches a shared cache entry
+        user = None
+    elif user is None:
+        return {**result, 'status': 401, 'body': {'detail': 'Token not found or incorrect format.'}}
+
+    async with slots, _total_slots:
+        subrequest = _build_subrequest(parent, item, user)
+        response = await rate_limiter.check(subrequest)
+        if response is None:
+            response = await forward_request(service, rest.partition('?')[0], subrequest)
+        body = await _response_body(response)
+
+    headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in response.raw_headers}
+    try:
+        parsed = json.loads(body) if body else None
+    except ValueError:
+        parsed = body.decode('utf-8', errors='replace')
+    return {**result, 'status': response.status_code, 'headers': headers, 'body': parsed}
+
+
+def setup_batch(app: FastAPI):
+    @app.post('/batch', include_in_schema=False)
+    async def batch(payload: BatchRequest, request: Request):
+        if len(payload.requests) > BATCH_MAX_REQUESTS:
+            raise HTTPException(status_code=413, detail=f'A batch may contain at most {BATCH_MAX_REQUESTS} requests')
+
+        # Authenticate once for the whole batch; anonymous batches may only reach public routes
+        user = getattr(request.state, 'user', None)
+        if user is None and request.headers.get('Authorization'):
+            user = await verify_jwt(request)
+
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        responses = await asyncio.gather(
+            *[_run_item(request, item, user, slots) for item in payload.requests]
+        )
+        logger.debug('Batch of %d requests completed', len(responses))
+        return await compress_response(request, JSONResponse({'responses': responses}))
@@ -0,0 +1,177 @@
+# gateway/blacklist_filter.py
+import asyncio
+import math
+import os
+from dotenv import load_dotenv
+from fastapi import FastAPI, Depends
+
+from .admin import require_admin
+from .redis_client import redis_client
+from .token_cache import token_cache, hash_token
+from .logging import logger
+
+
+load_dotenv()
+
+BLACKLIST_KEY_PREFIX = 'blacklisted_token:'
+LEGACY_BLACKLIST_KEY = 'blacklisted_tokens'
+BLACKLIST_CHANNEL = 'blacklisted_tokens:events'
+
+BLACKLIST_FILTER_CAPACITY = int(os.getenv('BLACKLIST_FILTER_CAPACITY', 100000))
+BLACKLIST_FILTER_ERROR_RATE = float(os.getenv('BLACKLIST_FILTER_ERROR_RATE', 0.001))
+# Bloom filters cannot forget, so expired revocations are dropped by rebuilding
+BLACKLIST_FILTER_REBUILD_INTERVAL = int(os.getenv('BLACKLIST_FILTER_REBUILD_INTERVAL', 3600))
+BLACKLIST_FILTER_RETRY_DELAY = 5
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes):
+        # Double hashing over a sha256 digest that was already computed for the token
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class RevokedTokenFilter:
+    def __init__(self, capacity: int = BLACKLIST_FILTER_CAPACITY, error_rate: float = BLACKLIST_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._pending = None
+        # The listener (after every resubscribe) and the periodic task both rebuild;
+        # one at a time, so neither publishes the other's half-filled filter
+        self._rebuild_lock = asyncio.Lock()
+        # Until the first rebuild finishes the filter knows nothing, so every check goes to Redis
+        self.ready = False
+        self._tasks = []
+
+        self.checks = 0
+        self.bypassed = 0
+        self.negatives = 0
+        self.positives = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+
+    def add(self, digest: bytes):
+        if digest not in self._filter:
+            self._filter.add(digest)
+        if self._pending is not None:
+            self._pending.add(digest)
+
+    def might_contain(self, digest: bytes) -> bool:
+        self.checks += 1
+        if not self.ready:
+            self.bypassed += 1
+            return True
+        if digest in self._filter:
+            self.positives += 1
+            return True
+        self.negatives += 1
+        return False
+
+    def record_redis_result(self, revoked: bool):
+        if self.ready and not revoked:
+            self.false_positives += 1
+
+    async def rebuild(self):
+        async with self._rebuild_lock:
+            self._pending = BloomFilter(self.capacity, self.error_rate)
+            try:
+                async for key in redis_client.scan_iter(match=f'{BLACKLIST_KEY_PREFIX}*', count=1000):
+                    self._pending.add(bytes.fromhex(key[len(BLACKLIST_KEY_PREFIX):]))
+                async for token in redis_client.sscan_iter(LEGACY_BLACKLIST_KEY, count=1000):
+                    self._pending.add(hash_token(token))
+                self._filter = self._pending
+            finally:
+                self._pending = None
+            self.ready = True
+            self.rebuilds += 1
+        logger.info('Blacklist filter rebuilt with %d revoked tokens', self._filter.count)
+
+    async def _listen(self):
+        while True:
+            try:
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(BLACKLIST_CHANNEL)
+                    # Rebuild after subscribing so revocations made in between are not lost
+                    await self.rebuild()
+                    async for message in pubsub.listen():
+                        if message['type'] != 'message':
+                            continue
+                        digest = bytes.fromhex(message['data'])
+                        self.add(digest)
+                        token_cache.invalidate_hash(digest)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ready = False
+                logger.error('Blacklist filter subscription failed: %s', e)
+                await asyncio.sleep(BLACKLIST_FILTER_RETRY_DELAY)
+
+    async def _periodic_rebuild(self):
+        while True:
+            await asyncio.sleep(BLACKLIST_FILTER_REBUILD_INTERVAL)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error('Blacklist filter rebuild failed: %s', e)
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._periodic_rebuild()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            'ready': self.ready,
+            'revoked_tokens': self._filter.count,
+            'capacity': self.capacity,
+            'bits': self._filter.size,
+            'hash_count': self._filter.hash_count,
+            'checks': self.checks,
+            'bypassed': self.bypassed,
+            'negatives': self.negatives,
+            'positives': self.positives,
+            'false_positives': self.false_positives,
+            'false_positive_rate': self.false_positives / self.positives if self.positives else 0.0,
+            'rebuilds': self.rebuilds,
+        }
+
+
+revoked_filter = RevokedTokenFilter()
+
+
+def setup_blacklist_filter(app: FastAPI):
+    @app.on_event('startup')
+    async def start_blacklist_filter():
+        revoked_filter.start()
+
+    @app.on_event('shutdown')
+    async def stop_blacklist_filter():
+        await revoked_filter.stop()
+
+    @app.get('/gateway/stats/blacklist-filter', include_in_schema=False, dependencies=[Depends(require_admin)])
+    async def blacklist_filter_stats():
+        return revoked_filter.stats()
@@ -0,0 +1,386 @@
+# gateway/cache.py
+import asyncio
+import base64
+import json
+import os
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import Response
+
+from .auth import PUBLIC_ENDPOINTS
+from .admin import require_admin
+from .routes import RouteTable
+from .singleflight import SingleFlight
+from .compression import compress_response
+from .redis_client import redis_client
+from .logging import logger
+
+
+load_dotenv()
+
+CACHE_ENABLED = os.getenv('GATEWAY_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CACHE_DEFAULT_TTL = float(os.getenv('GATEWAY_CACHE_TTL', 30))
+CACHE_STALE_WHILE_REVALIDATE = float(os.getenv('GATEWAY_CACHE_STALE_WHILE_REVALIDATE', 30))
+CACHE_MAX_ENTRIES = int(os.getenv('GATEWAY_CACHE_MAX_ENTRIES', 5000))
+CACHE_MAX_BODY_SIZE = int(os.getenv('GATEWAY_CACHE_MAX_BODY_SIZE', 1024 * 1024))
+# Share cached responses between gateway workers through Redis
+CACHE_REDIS_ENABLED = os.getenv('GATEWAY_CACHE_REDIS', 'false').lower() in ('1', 'true', 'yes')
+CACHE_KEY_PREFIX = 'gateway_cache:'
+
+# Freshness in seconds for public GET routes; anything not listed uses GATEWAY_CACHE_TTL.
+# An upstream Cache-Control max-age/s-maxage takes precedence over these.
+CACHE_ROUTE_TTLS = {
+    '/product/api/categories/': 300,
+    '/product/api/categories/{category_id}': 300,
+    '/shop/api/social-media/{shop_slug}/': 300,
+    '/shop/api/comments/{shop_slug}/': 10,
+    '/product/api/products/variations/{variation_id}/comments/': 10,
+}
+
+_CACHEABLE_ROUTES = RouteTable({
+    template: CACHE_ROUTE_TTLS.get(template, CACHE_DEFAULT_TTL)
+    for template, methods in PUBLIC_ENDPOINTS.items()
+    if 'GET' in methods
+})
+
+_UNCACHEABLE_VARY = ('*', 'authorization', 'cookie')
+# Stored headers repeated on a 304 built from the cache
+_NOT_MODIFIED_HEADERS = ('etag', 'last-modified', 'cache-control', 'expires', 'vary')
+
+
+def _parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in value.split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+
+def _seconds(directives: dict, name: str, default: float | None) -> float | None:
+    try:
+        return float(directives[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _header(headers: list, name: str) -> str | None:
+    return next((value for key, value in headers if key.lower() == name), None)
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def _not_modified(entry: 'CacheEntry', request: Request) -> bool:
+    # Client validators never reach upstream on cached routes, they are checked here
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since. Compared weakly, as
+        # compressed copies of an entry are sent with its ETag marked W/
+        tags = {_opaque_tag(tag.strip()) for tag in if_none_match.split(',')}
+        return '*' in tags or (bool(entry.etag) and _opaque_tag(entry.etag) in tags)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    last_modified = _header(entry.headers, 'last-modified')
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def _glob_escape(value: str) -> str:
+    for char in '\\*?[]':
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+class CacheEntry:
+    __slots__ = ('status', 'headers', 'body', 'etag', 'stored_at', 'fresh_until', 'stale_until', 'variants')
+
+    def __init__(self, status, headers, body, etag, stored_at, fresh_until, stale_until):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        # Compressed copies of body by content-encoding, filled on demand
+        self.variants = {}
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'status': self.status,
+            'headers': self.headers,
+            'body': base64.b64encode(self.body).decode(),
+            'etag': self.etag,
+            'stored_at': self.stored_at,
+            'fresh_until': self.fresh_until,
+            'stale_until': self.stale_until,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> 'CacheEntry':
+        data = json.loads(raw)
+        return cls(
+            data['status'],
+            [tuple(header) for header in data['headers']],
+            base64.b64decode(data['body']),
+            data['etag'],
+            data['stored_at'],
+            data['fresh_until'],
+            data['stale_until'],
+        )
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._revalidating: dict[str, asyncio.Task] = {}
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stores = 0
+        self.uncacheable = 0
+        self.evictions = 0
+        self.purged = 0
+
+    def route_ttl(self, request: Request) -> float | None:
+        if not CACHE_ENABLED or request.method != 'GET':
+            return None
+        route = _CACHEABLE_ROUTES.match(request.url.path)
+        return route[1] if route is not None else None
+
+    def make_key(self, request: Request) -> str:
+        query = urlencode(sorted(parse_qsl(request.url.query, keep_blank_values=True)))
+        return f'{CACHE_KEY_PREFIX}GET:{request.url.path}?{query}'
+
+    async def serve(self, request: Request, route_ttl: float, fetch) -> Response:
+        # fetch(extra_headers) performs the upstream GET and returns (httpx.Response, headers)
+        key = self.make_key(request)
+        entry = await self._load(key)
+        now = time.time()
+
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.hits += 1
+                return await self._respond(entry, request, 'HIT')
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._schedule_revalidation(key, route_ttl, entry, fetch)
+                return await self._respond(entry, request, 'STALE')
+
+        self.misses += 1
+        leader = False
+
+        async def revalidate():
+            nonlocal leader
+            leader = True
+            return await self._revalidate(key, route_ttl, entry, fetch)
+
+        # Concurrent misses for the same key wait on one upstream request
+        entry, upstream = await self._flights.do(key, revalidate)
+        if entry is None and not leader:
+            # A response that could not be cached is not shared either (it may set a
+            # cookie or be marked no-store), so each waiter asks upstream itself
+            entry, upstream = await self._revalidate(key, route_ttl, None, fetch)
+        if upstream is None:
+            return await self._respond(entry, request, 'REVALIDATED')
+        if entry is not None:
+            return await self._respond(entry, request, 'MISS')
+
+        resp, headers = upstream
+        response = Response(content=resp.content, status_code=resp.status_code, headers=headers)
+        response.headers['x-cache'] = 'BYPASS'
+        return await compress_response(request, response)
+
+    async def _revalidate(self, key: str, route_ttl: float, entry: CacheEntry | None, fetch):
+        extra_headers = {'if-none-match': entry.etag} if entry is not None and entry.etag else {}
+        resp, headers = await fetch(extra_headers)
+
+        if resp.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            renewed = self._build_entry(resp, entry.headers, entry.body, route_ttl, entry.status, entry.etag)
+            if renewed is not None:
+                renewed.variants = entry.variants
+                await self._save(key, renewed)
+                return renewed, None
+            return entry, None
+
+        new_entry = self._build_entry(resp, list(headers.items()), resp.content, route_ttl)
+        if new_entry is None:
+            self.uncacheable += 1
+            self._entries.pop(key, None)
+        else:
+            await self._save(key, new_entry)
+        return new_entry, (resp, headers)
+
+    def _schedule_revalidation(self, key: str, route_ttl: float, entry: CacheEntry, fetch):
+        if key in self._revalidating:
+            return
+        self._revalidating[key] = asyncio.create_task(
+            self._background_revalidate(key, route_ttl, entry, fetch)
+        )
+
+    async def _background_revalidate(self, key: str, route_ttl: float, entry: CacheEntry, fetch):
+        try:
+            await self._revalidate(key, route_ttl, entry, fetch)
+        except Exception as e:
+            logger.warning('Background revalidation failed for %s: %s', key, e)
+        finally:
+            self._revalidating.pop(key, None)
+
+    def _build_entry(self, resp, headers, body, route_ttl, status=None, etag=None) -> CacheEntry | None:
+        status = status or resp.status_code
+        if status != 200 or len(body) > CACHE_MAX_BODY_SIZE:
+            return None
+
+        directives = _parse_cache_control(resp.headers.get('cache-control', ''))
+        if 'no-store' in directives or 'private' in directives:
+            return None
+        vary = resp.headers.get('vary', '').lower()
+        if any(token in vary for token in _UNCACHEABLE_VARY) or 'set-cookie' in resp.headers:
+            return None
+
+        ttl = _seconds(directives, 's-maxage', _seconds(directives, 'max-age', route_ttl))
+        if 'no-cache' in directives:
+            ttl = 0
+        stale = _seconds(directives, 'stale-while-revalidate', CACHE_STALE_WHILE_REVALIDATE)
+        etag = resp.headers.get('etag', etag)
+        if ttl <= 0 and not etag:
+            return None
+
+        now = time.time()
+        # no-cache responses must be revalidated before every use, so they are never served stale
+        stale_until = now + ttl + (stale if ttl > 0 else 0)
+        return CacheEntry(status, headers, body, etag, now, now + ttl, stale_until)
+
+    async def _respond(self, entry: CacheEntry, request: Request, cache_status: str) -> Response:
+        cache_headers = [
+            (b'age', str(int(time.time() - entry.stored_at)).encode()),
+            (b'x-cache', cache_status.encode()),
+        ]
+        if _not_modified(entry, request):
+            response = Response(status_code=304)
+            response.raw_headers = [
+                (name.encode('latin-1'), value.encode('latin-1'))
+                for name, value in entry.headers
+                if name.lower() in _NOT_MODIFIED_HEADERS
+            ] + cache_headers
+            return response
+
+        response = Response(content=entry.body, status_code=entry.status)
+        response.raw_headers.extend(
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in entry.headers
+            if name.lower() != 'content-length'
+        )
+        response.raw_headers.extend(cache_headers)
+        return await compress_response(request, response, entry.variants)
+
+    async def _load(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if not CACHE_REDIS_ENABLED:
+            return None
+
+        try:
+            raw = await redis_client.get(key)
+        except Exception as e:
+            logger.warning('Response cache read failed: %s', e)
+            return None
+        if raw is None:
+            return None
+        entry = CacheEntry.from_json(raw)
+        self._store_local(key, entry)
+        return entry
+
+    async def _save(self, key: str, entry: CacheEntry):
+        self.stores += 1
+        self._store_local(key, entry)
+        if not CACHE_REDIS_ENABLED:
+            return
+        try:
+            await redis_client.set(key, entry.to_json(), ex=max(1, int(entry.stale_until - time.time()) + 1))
+        except Exception as e:
+            logger.warning('Response cache write failed: %s', e)
+
+    def _store_local(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def purge(self, prefix: str = '') -> int:
+        match = f'{CACHE_KEY_PREFIX}GET:{prefix}'
+        purged = {key for key in self._entries if key.startswith(match)}
+        for key in purged:
+            del self._entries[key]
+
+        if CACHE_REDIS_ENABLED:
+            batch = []
+            async for key in redis_client.scan_iter(match=f'{_glob_escape(match)}*', count=1000):
+                batch.append(key)
+                if len(batch) >= 500:
+                    await redis_client.unlink(*batch)
+                    purged.update(batch)
+                    batch = []
+            if batch:
+                await redis_client.unlink(*batch)
+                purged.update(batch)
+
+        self.purged += len(purged)
+        logger.info('Purged %d cached responses under %r', len(purged), prefix or '/')
+        return len(purged)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'enabled': CACHE_ENABLED,
+            'redis': CACHE_REDIS_ENABLED,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'not_modified': self.not_modified,
+            'stores': self.stores,
+            'uncacheable': self.uncacheable,
+            'evictions': self.evictions,
+            'purged': self.purged,
+            'revalidating': len(self._revalidating),
+            'coalescing': self._flights.stats(),
+        }
+
+
+response_cache = ResponseCache()
+
+
+def setup_cache(app: FastAPI):
+    @app.post('/gateway/cache/purge', include_in_schema=False, dependencies=[Depends(require_admin)])
+    async def purge_cache(request: Request):
+        try:
+            body = await request.json()
+        except Exception:
+            body = {}
+        prefix = body.get('prefix', '') if isinstance(body, dict) else ''
+        return {'purged': await response_cache.purge(prefix)}
+
+    @app.get('/gateway/stats/cache', include_in_schema=False)
+    async def cache_stats():
+        return response_cache.stats()
@@ -0,0 +1,80 @@
+# gateway/clients.py
+import httpx
+from fastapi import FastAPI
+
+from .services import SERVICE_URLS, SERVICE_SETTINGS, DEFAULT_TIMEOUT
+from .logging import logger
+
+
+class ServiceClientPool:
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def _create_client(self, service: str) -> httpx.AsyncClient:
+        settings = SERVICE_SETTINGS.get(service, {})
+        limits = httpx.Limits(
+            max_connections=settings.get('max_connections'),
+            max_keepalive_connections=settings.get('max_keepalive_connections'),
+            keepalive_expiry=settings.get('keepalive_expiry'),
+        )
+        return httpx.AsyncClient(
+            timeout=settings.get('timeout', DEFAULT_TIMEOUT),
+            limits=limits,
+            http2=settings.get('http2', False),
+            verify=False,
+        )
+
+    def start(self):
+        for service in SERVICE_URLS:
+            if service not in self._clients:
+                self._clients[service] = self._create_client(service)
+        logger.info('Connection pools started for: %s', ', '.join(self._clients))
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        logger.info('Connection pools closed')
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        client = self._clients.get(service)
+        if client is None:
+            client = self._clients[service] = self._create_client(service)
+        return client
+
+    def stats(self) -> dict:
+        result = {}
+        for service, client in self._clients.items():
+            settings = SERVICE_SETTINGS.get(service, {})
+            # httpx does not expose pool occupancy publicly, read it off the httpcore pool
+            pool = getattr(client._transport, '_pool', None)
+            connections = list(getattr(pool, 'connections', []))
+            idle = sum(1 for conn in connections if conn.is_idle())
+            result[service] = {
+                'connections': len(connections),
+                'active': len(connections) - idle,
+                'idle': idle,
+                'queued_requests': len(getattr(pool, '_requests', [])),
+                'max_connections': settings.get('max_connections'),
+                'max_keepalive_connections': settings.get('max_keepalive_connections'),
+                'keepalive_expiry': settings.get('keepalive_expiry'),
+                'http2': settings.get('http2', False),
+            }
+        return result
+
+
+service_clients = ServiceClientPool()
+
+
+def setup_clients(app: FastAPI):
+    @app.on_event('startup')
+    async def start_clients():
+        service_clients.start()
+
+    @app.on_event('shutdown')
+    async def close_clients():
+        await service_clients.close()
+
+    @app.get('/gateway/stats/pools', include_in_schema=False)
+    async def pool_stats():
+        return service_clients.stats()
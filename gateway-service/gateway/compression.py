@@ -0,0 +1,112 @@
+# gateway/compression.py
+import asyncio
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+load_dotenv()
+
+COMPRESSION_ENABLED = os.getenv('GATEWAY_COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_SIZE = int(os.getenv('GATEWAY_COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_THREADS = int(os.getenv('GATEWAY_COMPRESSION_THREADS', 4))
+# Let upstream compress streamed responses and relay the bytes as they are
+COMPRESSION_PASSTHROUGH = os.getenv('GATEWAY_COMPRESSION_PASSTHROUGH', 'false').lower() in ('1', 'true', 'yes')
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+_compressors = {'gzip': lambda body: gzip.compress(body, GZIP_LEVEL)}
+if brotli is not None:
+    _compressors['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+if zstandard is not None:
+    _compressors['zstd'] = lambda body: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = [encoding for encoding in ('zstd', 'br', 'gzip') if encoding in _compressors]
+
+# zlib, brotli and zstandard release the GIL, so these threads compress in parallel
+_executor = ThreadPoolExecutor(max_workers=COMPRESSION_THREADS, thread_name_prefix='gateway-compress')
+
+
+def choose_encoding(accept_encoding: str | None, encodings: list[str] | None = None) -> str | None:
+    # encodings narrows the choice to what the caller has on hand, in preference order
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODING_PREFERENCE if encodings is None else encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+async def compress(body: bytes, encoding: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _compressors[encoding], body)
+
+
+async def compress_response(request, response: Response, variants: dict | None = None) -> Response:
+    # variants caches compressed bodies per encoding for responses that are served repeatedly
+    if not COMPRESSION_ENABLED or response.status_code in (204, 304):
+        return response
+    body = response.body
+    headers = response.headers
+    if len(body) < COMPRESSION_MIN_SIZE or 'content-encoding' in headers or not is_compressible(headers.get('content-type')):
+        return response
+
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    if encoding is None:
+        return response
+
+    compressed = variants.get(encoding) if variants is not None else None
+    if compressed is None:
+        compressed = await compress(body, encoding)
+        if variants is not None:
+            variants[encoding] = compressed
+
+    response.body = compressed
+    headers['content-encoding'] = encoding
+    headers['content-length'] = str(len(compressed))
+    vary = headers.get('vary')
+    if not vary:
+        headers['vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower():
+        headers['vary'] = f'{vary}, Accept-Encoding'
+    # The compressed bytes differ from the identity body the strong ETag describes
+    etag = headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        headers['etag'] = f'W/{etag}'
+    return response
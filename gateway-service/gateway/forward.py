@@ -1,74 +1,288 @@
 # gateway/forward.py
+import asyncio
+import time
 import httpx
-from fastapi.responses import JSONResponse, Response
-from urllib.parse import urlparse
-from .services import SERVICE_URLS
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from .services import SERVICE_URLS, SERVICE_SETTINGS
+from .clients import service_clients
+from .balancer import service_balancers, Upstream
+from .hedging import hedge_delay, hedge_budgets
+from .cache import response_cache
+from .resilience import service_guards, ServiceUnavailable
+from .compression import compress_response, COMPRESSION_PASSTHROUGH
+from .metrics import route_template, UPSTREAM_DURATION, UPSTREAM_ERRORS, HEDGED_REQUESTS
 from .logging import logger
+from .tracing import current_traceparent
 
 
 # Constants
+# Host is left to httpx so it matches whichever replica the request is sent to
 EXCLUDED_REQUEST_HEADERS = {'host', 'connection', 'content-length', 'accept-encoding', 'cookie', 'referer'}
+# Set by the gateway only, whatever the client sent
+GATEWAY_REQUEST_HEADERS = {'x-user-id', 'traceparent'}
+EXCLUDED_RAW_REQUEST_HEADERS = frozenset(
+    h.encode('latin-1') for h in EXCLUDED_REQUEST_HEADERS | GATEWAY_REQUEST_HEADERS
+)
 EXCLUDED_RESPONSE_HEADERS = {'content-encoding', 'transfer-encoding', 'connection'}
-DEFAULT_TIMEOUT = 30.0
+EXCLUDED_RAW_RESPONSE_HEADERS = {h.encode('latin-1') for h in EXCLUDED_RESPONSE_HEADERS}
+PASSTHROUGH_RAW_RESPONSE_HEADERS = {b'transfer-encoding', b'connection'}
+# A cached fetch is shared by every client waiting on the same key, so it must not carry
+# one client's conditions; the cache answers those itself from the stored entry
+CLIENT_CONDITIONAL_RAW_REQUEST_HEADERS = frozenset({b'if-none-match', b'if-modified-since', b'range', b'if-range'})
 
 
 async def forward_request(service: str, path: str, request):
     if service not in SERVICE_URLS:
         return JSONResponse({'error': 'Unknown service'}, status_code=400)
 
-  
-    url = f'{SERVICE_URLS[service].rstrip('/')}/{path.lstrip('/')}'
+    cache_ttl = response_cache.route_ttl(request)
+    if cache_ttl is None and SERVICE_SETTINGS[service]['streaming']:
+        return await stream_request(service, path, request)
+
+    route = route_template(request.url.path)
+    query = request.url.query
     headers = _prepare_headers(request, service)
     body = await request.body()
     
-    logger.info(f"Forwarding request to {url} | Method: {request.method}")
+    logger.debug('Forwarding request to %s/%s | Method: %s', service, path, request.method)
 
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, verify=False) as client:
-            resp = await client.request(request.method, url, headers=headers, content=body)
+        if cache_ttl is not None:
+            cache_headers = [item for item in headers if item[0] not in CLIENT_CONDITIONAL_RAW_REQUEST_HEADERS]
+
+            async def fetch(extra_headers: dict):
+                # Only the cache's own validators go upstream
+                request_headers = cache_headers + [
+                    (name.encode('latin-1'), value.encode('latin-1')) for name, value in extra_headers.items()
+                ]
+                return await _send(service, route, path, query, request.method, request_headers, body)
 
-        resp_headers = {k: v for k, v in resp.headers.items() 
-                       if k.lower() not in EXCLUDED_RESPONSE_HEADERS}
-        
-        logger.info(f'Received {resp.status_code} from {url}')
+            return await response_cache.serve(request, cache_ttl, fetch)
 
-        return Response(
+        resp, resp_headers = await _send(service, route, path, query, request.method, headers, body)
+        return await compress_response(request, Response(
             content=resp.content,
             status_code=resp.status_code,
             headers=resp_headers,
             media_type=resp.headers.get('content-type'),
-        )
+        ))
 
+    except ServiceUnavailable as e:
+        return _unavailable(e)
     except httpx.RequestError as e:
-        logger.error(f'RequestError: {e}')
+        logger.error('RequestError: %s', e)
         return JSONResponse({'error': f'Service unreachable: {e}'}, status_code=503)
     except Exception as e:
-        logger.error(f'Unexpected error: {e}')
+        logger.error('Unexpected error: %s', e)
         return JSONResponse({'error': str(e)}, status_code=500)
 
 
-def _prepare_headers(request, service: str):
-    headers = {k.lower(): v for k, v in request.headers.items() 
-               if k.lower() not in EXCLUDED_REQUEST_HEADERS}
-    auth_header = request.headers.get('Authorization')
-    if auth_header:
-        headers['authorization'] = auth_header
-        logger.info(f'Forwarding with Authorization header: {auth_header}')
+def _record_upstream_error(service: str, error: Exception):
+    if isinstance(error, ServiceUnavailable):
+        if 'circuit' in error.reason:
+            reason = 'circuit_open'
+        elif 'upstream' in error.reason:
+            reason = 'no_upstream'
+        else:
+            reason = 'concurrency_limit'
+    elif isinstance(error, httpx.TimeoutException):
+        reason = 'timeout'
+    elif isinstance(error, httpx.ConnectError):
+        reason = 'connect'
     else:
-        logger.warning('No Authorization header found')
+        reason = 'request'
+    UPSTREAM_ERRORS.inc(service, reason)
+
+
+def _unavailable(error: ServiceUnavailable):
+    logger.warning('Rejected request to %s: %s', error.service, error.reason)
+    headers = {'Retry-After': str(error.retry_after)} if error.retry_after else None
+    return JSONResponse({'error': f'Service unavailable: {error}'}, status_code=503, headers=headers)
+
+
+def _upstream_url(upstream: Upstream, path: str, query: str) -> str:
+    url = f'{upstream.url}/{path.lstrip('/')}'
+    return f'{url}?{query}' if query else url
+
+
+def _pick_upstream(service: str) -> Upstream:
+    upstream = service_balancers[service].pick()
+    if upstream is None:
+        error = ServiceUnavailable(service, 'has no upstream configured')
+        _record_upstream_error(service, error)
+        raise error
+    return upstream
+
+
+async def _send(service: str, route: str, path: str, query: str, method: str, headers: list, body: bytes):
+    upstream = _pick_upstream(service)
+    delay = hedge_delay(service, route, method)
+    if delay is None:
+        return await _attempt(service, upstream, route, path, query, method, headers, body)
+
+    attempts = [asyncio.ensure_future(_attempt(service, upstream, route, path, query, method, headers, body))]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        # Slower than the service's p95: try another replica and take whichever answers first
+        backup = None if done else service_balancers[service].pick(exclude=upstream)
+        if backup is None:
+            return await attempts[0]
+        if not hedge_budgets[service].withdraw(route):
+            HEDGED_REQUESTS.inc(service, 'over_budget')
+            return await attempts[0]
+        attempts.append(asyncio.ensure_future(_attempt(service, backup, route, path, query, method, headers, body)))
+        HEDGED_REQUESTS.inc(service, 'sent')
+
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is not attempts[0]:
+                        HEDGED_REQUESTS.inc(service, 'won')
+                    return attempt.result()
+        # Every attempt failed, report the first one's error
+        return attempts[0].result()
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+async def _attempt(service: str, upstream: Upstream, route: str, path: str, query: str, method: str, headers: list, body: bytes):
+    client = service_clients.get(service)
+    guard = service_guards[service]
+    balancer = service_balancers[service]
+    try:
+        timeout = guard.admit()
+    except ServiceUnavailable as e:
+        _record_upstream_error(service, e)
+        raise
+    url = _upstream_url(upstream, path, query)
+    balancer.acquire(upstream)
+    start = time.perf_counter()
+    success = None
+    try:
+        resp = await client.request(method, url, headers=headers, content=body, timeout=timeout)
+        success = resp.status_code < 500
+    except httpx.RequestError as e:
+        success = False
+        _record_upstream_error(service, e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        guard.release(success, elapsed)
+        balancer.release(upstream, success, elapsed)
+    UPSTREAM_DURATION.observe(elapsed, service, route)
+
+    resp_headers = {k: v for k, v in resp.headers.items() 
+                   if k.lower() not in EXCLUDED_RESPONSE_HEADERS}
+    
+    logger.debug('Received %s from %s', resp.status_code, url)
+    return resp, resp_headers
+
+
+async def stream_request(service: str, path: str, request):
+    headers = _prepare_headers(request, service)
+
+    # Pass the body through chunk by chunk. Keep the client's content-length so
+    # upstream WSGI servers get a sized body instead of a chunked one.
+    content = None
+    content_length = request.headers.get('content-length')
+    if content_length:
+        headers.append((b'content-length', content_length.encode('latin-1')))
+        content = request.stream()
+    elif 'transfer-encoding' in request.headers:
+        content = request.stream()
+
+    accept_encoding = request.headers.get('accept-encoding')
+    if COMPRESSION_PASSTHROUGH and accept_encoding:
+        headers.append((b'accept-encoding', accept_encoding.encode('latin-1')))
+
+    logger.debug('Streaming request to %s/%s | Method: %s', service, path, request.method)
+
+    client = service_clients.get(service)
+    guard = service_guards[service]
+    balancer = service_balancers[service]
+    try:
+        upstream = _pick_upstream(service)
+    except ServiceUnavailable as e:
+        return _unavailable(e)
+    try:
+        timeout = guard.admit()
+    except ServiceUnavailable as e:
+        _record_upstream_error(service, e)
+        return _unavailable(e)
+
+    url = _upstream_url(upstream, path, request.url.query)
+    upstream_request = client.build_request(
+        request.method, url, headers=headers, content=content, timeout=timeout
+    )
+    # The guard covers the wait for response headers; the body is streamed afterwards
+    balancer.acquire(upstream)
+    start = time.perf_counter()
+    success = None
+    try:
+        resp = await client.send(upstream_request, stream=True)
+        success = resp.status_code < 500
+    except httpx.RequestError as e:
+        success = False
+        _record_upstream_error(service, e)
+        logger.error('RequestError: %s', e)
+        return JSONResponse({'error': f'Service unreachable: {e}'}, status_code=503)
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+    finally:
+        elapsed = time.perf_counter() - start
+        guard.release(success, elapsed)
+        balancer.release(upstream, success, elapsed)
+    UPSTREAM_DURATION.observe(elapsed, service, route_template(request.url.path))
+
+    logger.debug('Streaming %s from %s', resp.status_code, url)
+
+    if COMPRESSION_PASSTHROUGH:
+        # Relay the upstream bytes, compressed or not, together with their encoding
+        response = StreamingResponse(
+            resp.aiter_raw(),
+            status_code=resp.status_code,
+            background=BackgroundTask(resp.aclose),
+        )
+        response.raw_headers = [
+            (key, value) for key, value in resp.headers.raw
+            if key.lower() not in PASSTHROUGH_RAW_RESPONSE_HEADERS
+        ]
+        return response
+
+    # A decoded body no longer matches the upstream content-length
+    decoded = 'content-encoding' in resp.headers
+    response = StreamingResponse(
+        resp.aiter_bytes(),
+        status_code=resp.status_code,
+        background=BackgroundTask(resp.aclose),
+    )
+    response.raw_headers = [
+        (key, value) for key, value in resp.headers.raw
+        if (name := key.lower()) not in EXCLUDED_RAW_RESPONSE_HEADERS
+        and not (decoded and name == b'content-length')
+    ]
+    return response
+
+
+def _prepare_headers(request, service: str) -> list[tuple[bytes, bytes]]:
+    # ASGI hands over header names already lowercased, as latin-1 bytes; httpx takes
+    # the same pairs as they are, so nothing is decoded or re-encoded on the way.
+    headers = [item for item in request.scope['headers'] if item[0] not in EXCLUDED_RAW_REQUEST_HEADERS]
 
     user = getattr(request.state, 'user', None)
     if user:
         user_id = user.get('sub') or user.get('user_id')
         if user_id:
-            headers['x-user-id'] = str(user_id)
-            logger.info(f'Forwarding with X-User-ID: {user_id}')
+            headers.append((b'x-user-id', str(user_id).encode()))
         else:
             logger.warning('User ID not found in request.state.user')
-    else:
-        logger.warning('No user in request.state, X-User-ID not set')
 
-    parsed = urlparse(SERVICE_URLS[service])
-    headers['host'] = parsed.netloc
-    
-    return headers
\ No newline at end of file
+    traceparent = current_traceparent()
+    if traceparent is not None:
+        headers.append((b'traceparent', traceparent.encode()))
+    return headers
@@ -0,0 +1,70 @@
+import os
+from fastapi import FastAPI
+
+from .services import SERVICE_URLS, SERVICE_SETTINGS
+from .resilience import service_guards
+from .balancer import service_balancers
+
+
+# Only methods that are safe to send twice
+HEDGE_METHODS = frozenset({'GET', 'HEAD'})
+HEDGE_PERCENTILE = float(os.getenv('GATEWAY_HEDGE_PERCENTILE', 0.95))
+# Hedges a route may send back to back before its budget has to refill
+HEDGE_BURST = float(os.getenv('GATEWAY_HEDGE_BURST', 10))
+
+
+class HedgeBudget:
+    # Token bucket per route: every eligible request deposits `ratio` tokens and every
+    # hedge spends one, so hedges stay within that share of the route's traffic.
+    def __init__(self, ratio: float, burst: float = HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens: dict[str, float] = {}
+        self.sent = 0
+        self.denied = 0
+
+    def deposit(self, route: str):
+        self._tokens[route] = min(self.burst, self._tokens.get(route, 0.0) + self.ratio)
+
+    def withdraw(self, route: str) -> bool:
+        tokens = self._tokens.get(route, 0.0)
+        if tokens < 1.0:
+            self.denied += 1
+            return False
+        self._tokens[route] = tokens - 1.0
+        self.sent += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'ratio': self.ratio,
+            'sent': self.sent,
+            'denied': self.denied,
+            'routes': {route: round(tokens, 2) for route, tokens in self._tokens.items()},
+        }
+
+
+hedge_budgets = {
+    service: HedgeBudget(SERVICE_SETTINGS[service]['hedge_budget']) for service in SERVICE_URLS
+}
+
+
+def hedge_delay(service: str, route: str, method: str) -> float | None:
+    # Seconds to wait before hedging this request, or None to send it once
+    if not SERVICE_SETTINGS[service]['hedge'] or method not in HEDGE_METHODS:
+        return None
+    if len(service_balancers[service].upstreams) < 2:
+        return None
+    delay = service_guards[service].latency.percentile(HEDGE_PERCENTILE)
+    if delay is None:
+        return None
+    hedge_budgets[service].deposit(route)
+    return delay
+
+
+def setup_hedging(app: FastAPI):
+    @app.get('/gateway/stats/hedging', include_in_schema=False)
+    async def hedging_stats():
+        return {
+            service: budget.stats() for service, budget in hedge_budgets.items() if SERVICE_SETTINGS[service]['hedge']
+        }
@@ -1,19 +1,99 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOG_LEVEL = os.getenv('GATEWAY_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('GATEWAY_LOG_FORMAT', 'json').lower()
+LOG_FILE = os.getenv('GATEWAY_LOG_FILE', 'gateway.log')
+LOG_QUEUE_SIZE = int(os.getenv('GATEWAY_LOG_QUEUE_SIZE', 10000))
+
+# Share of requests whose INFO lines are kept, e.g. GATEWAY_LOG_SAMPLE_RATES="product=0.01,shop=0.1".
+# Keys are the first path segment (the service); warnings and errors are never sampled out.
+LOG_SAMPLE_RATE = float(os.getenv('GATEWAY_LOG_SAMPLE_RATE', 1.0))
+LOG_SAMPLE_RATES = {
+    route.strip(): float(rate)
+    for route, _, rate in (
+        item.partition('=') for item in os.getenv('GATEWAY_LOG_SAMPLE_RATES', '').split(',') if '=' in item
+    )
+}
+
+request_sampled: ContextVar[bool] = ContextVar('request_sampled', default=True)
+
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def should_sample(path: str) -> bool:
+    route = path.lstrip('/').partition('/')[0]
+    rate = LOG_SAMPLE_RATES.get(route, LOG_SAMPLE_RATE)
+    return rate >= 1.0 or random.random() < rate
+
+
+class SamplingFilter(logging.Filter):
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or request_sampled.get()
+
+
+class DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare() formats the message on the calling thread; leave that
+    # to the listener thread so the request path only pays for enqueueing.
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        # Drop rather than block or raise when the listener falls behind
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
 
 
 logger = logging.getLogger('gateway')
-logger.setLevel(logging.INFO)  
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
 
-formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+if LOG_FORMAT == 'json':
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
 
-file_handler = logging.FileHandler("gateway.log")
-file_handler.setLevel(logging.INFO)
+file_handler = logging.FileHandler(LOG_FILE)
 file_handler.setFormatter(formatter)
 
 console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = DeferredQueueHandler(log_queue)
+queue_handler.addFilter(SamplingFilter())
+
+listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
 
+logger.addHandler(queue_handler)
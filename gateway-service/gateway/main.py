@@ -4,6 +4,17 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .logging import logger
 from .forward import forward_request
+from .clients import setup_clients
+from .blacklist_filter import setup_blacklist_filter
+from .cache import setup_cache
+from .resilience import setup_resilience
+from .balancer import setup_balancer
+from .hedging import setup_hedging
+from .rate_limit import setup_rate_limit
+from .batch import setup_batch
+from .metrics import setup_metrics
+from .token_cache import token_cache
+from .redis_client import redis_client
 from .middleware import (
     log_requests_middleware,
     auth_middleware,
@@ -24,10 +35,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    # Set by services on paginated lists; browsers hide other response headers from scripts
+    expose_headers=['X-Next-Cursor'],
 )
 
-app.middleware('http')(log_requests_middleware)
+# The last registered middleware runs first, so request logging wraps auth
 app.middleware('http')(auth_middleware)
+app.middleware('http')(log_requests_middleware)
+
+setup_clients(app)
+setup_blacklist_filter(app)
+setup_cache(app)
+setup_resilience(app)
+setup_balancer(app)
+setup_hedging(app)
+setup_rate_limit(app)
+setup_batch(app)
+setup_metrics(app)
+
+
+@app.on_event('shutdown')
+async def close_redis():
+    await redis_client.aclose()
+
+
+@app.get('/gateway/stats/jwt-cache', include_in_schema=False)
+async def jwt_cache_stats():
+    return token_cache.stats()
 
 
 @app.api_route('/{service}/{full_path:path}', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
@@ -0,0 +1,212 @@
+# gateway/metrics.py
+import asyncio
+import os
+import re
+import time
+from bisect import bisect_left
+from dotenv import load_dotenv
+from fastapi import FastAPI
+
+from .routes import RouteTable
+
+
+load_dotenv()
+
+# /metrics is served on its own port, which Traefik does not route to, so only
+# Prometheus on the Docker network can read it. 0 turns the listener off.
+METRICS_HOST = os.getenv('GATEWAY_METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('GATEWAY_METRICS_PORT', 9100))
+METRICS_CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+METRICS_READ_TIMEOUT = 5
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Paths that match no known template collapse their id-like segments; past this many
+# distinct routes everything else is labelled 'other' to keep label cardinality bounded.
+MAX_ROUTE_LABELS = 500
+
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F-]{32,36})$')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def expose(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in self._values.items():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, seconds: float, *labels):
+        value = self._values.get(labels)
+        if value is None:
+            value = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        value[0][bisect_left(self.buckets, seconds)] += 1
+        value[1] += seconds
+        value[2] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def expose(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        names = self.labelnames + ('le',)
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+_known_routes = RouteTable()
+_route_labels: dict[str, str] = {}
+
+
+def register_route_templates(templates):
+    for template in templates:
+        _known_routes.add(template, template)
+
+
+def route_template(path: str) -> str:
+    label = _route_labels.get(path)
+    if label is not None:
+        return label
+
+    route = _known_routes.match(path)
+    if route is not None:
+        label = route[0]
+    else:
+        label = '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+    if len(_route_labels) >= MAX_ROUTE_LABELS:
+        return label if route is not None else 'other'
+    _route_labels[path] = label
+    return label
+
+
+REQUEST_DURATION = Histogram(
+    'gateway_request_duration_seconds', 'Time from request arrival to response at the gateway',
+    ('service', 'route', 'method'),
+)
+AUTH_DURATION = Histogram(
+    'gateway_auth_duration_seconds', 'Time spent in auth_middleware before forwarding', ('route',),
+)
+JWT_VERIFY_DURATION = Histogram(
+    'gateway_jwt_verify_duration_seconds', 'Time spent in verify_jwt', ('result',),
+)
+BLACKLIST_CHECK_DURATION = Histogram(
+    'gateway_blacklist_check_duration_seconds', 'Redis round trip of the token blacklist check',
+)
+UPSTREAM_DURATION = Histogram(
+    'gateway_upstream_duration_seconds', 'Time until the upstream service answered', ('service', 'route'),
+)
+RESPONSES = Counter(
+    'gateway_responses_total', 'Responses sent by the gateway', ('service', 'route', 'method', 'status'),
+)
+UPSTREAM_ERRORS = Counter(
+    'gateway_upstream_errors_total', 'Upstream calls that failed before a response', ('service', 'reason'),
+)
+HEDGED_REQUESTS = Counter(
+    'gateway_hedged_requests_total', 'Hedged upstream attempts by outcome: sent, won, over_budget',
+    ('service', 'outcome'),
+)
+
+REGISTRY = (
+    REQUEST_DURATION,
+    AUTH_DURATION,
+    JWT_VERIFY_DURATION,
+    BLACKLIST_CHECK_DURATION,
+    UPSTREAM_DURATION,
+    RESPONSES,
+    UPSTREAM_ERRORS,
+    HEDGED_REQUESTS,
+)
+
+
+def render_metrics() -> bytes:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return ('\n'.join(lines) + '\n').encode()
+
+
+async def _serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Just enough HTTP/1.1 for a scraper: one GET per connection, then close
+    try:
+        async with asyncio.timeout(METRICS_READ_TIMEOUT):
+            request_line = await reader.readline()
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass
+        parts = request_line.split()
+        if len(parts) == 3 and parts[0] == b'GET' and parts[1].partition(b'?')[0] == b'/metrics':
+            status, content_type, body = b'200 OK', METRICS_CONTENT_TYPE, render_metrics()
+        else:
+            status, content_type, body = b'404 Not Found', b'text/plain', b'Not found\n'
+        writer.write(
+            b'HTTP/1.1 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: close\r\n\r\n'
+            % (status, content_type, len(body)) + body
+        )
+        await writer.drain()
+    except (TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def setup_metrics(app: FastAPI):
+    @app.on_event('startup')
+    async def start_metrics_listener():
+        if METRICS_PORT:
+            app.state.metrics_server = await asyncio.start_server(_serve_metrics, METRICS_HOST, METRICS_PORT)
+
+    @app.on_event('shutdown')
+    async def stop_metrics_listener():
+        server = getattr(app.state, 'metrics_server', None)
+        if server is not None:
+            server.close()
+            await server.wait_closed()
@@ -1,27 +1,59 @@
 import httpx
 import json
+import time
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from .logging import logger
+from .logging import logger, request_sampled, should_sample
 from .auth import verify_jwt, is_endpoint_public, handle_login, handle_logout
+from .rate_limit import rate_limiter
 from .services import SERVICE_URLS
+from .metrics import route_template, REQUEST_DURATION, AUTH_DURATION, RESPONSES
+from .tracing import span, request_traceparent
 
 
 async def log_requests_middleware(request: Request, call_next):
-    logger.info(f'Incoming request: {request.method} {request.url}')
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        logger.error(f'Error handling request: {e}')
-        return JSONResponse({'error': str(e)}, status_code=500)
-    logger.info(f'Response status: {response.status_code} for {request.method} {request.url}')
+    path = request.url.path
+    sampled = request_sampled.set(should_sample(path))
+    start = time.perf_counter()
+    with span(request.method, 'server', request_traceparent(request), method=request.method, path=path) as trace:
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            logger.error('Error handling request %s %s: %s', request.method, path, e)
+            response = JSONResponse({'error': str(e)}, status_code=500)
+
+        elapsed = time.perf_counter() - start
+        service = path.lstrip('/').partition('/')[0]
+        if service not in SERVICE_URLS:
+            service = 'gateway'
+        route = route_template(path)
+        trace.name = f'{request.method} {route}'
+        trace.attributes['status_code'] = response.status_code
+        REQUEST_DURATION.observe(elapsed, service, route, request.method)
+        RESPONSES.inc(service, route, request.method, response.status_code)
+
+        logger.info(
+            '%s %s %s', request.method, path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': path,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'trace_id': trace.trace_id,
+            },
+        )
+    request_sampled.reset(sampled)
     return response
 
 
 async def auth_middleware(request: Request, call_next):
     path = request.url.path
+    start = time.perf_counter()
 
     if path == '/user/api/user/login/' and request.method == 'POST':
+        limited = await rate_limiter.check(request)
+        if limited is not None:
+            return limited
         return await handle_login(request)
     
     if path == '/user/api/user/logout/' and request.method == 'POST':
@@ -29,7 +61,7 @@ async def auth_middleware(request: Request, call_next):
             payload = await verify_jwt(request)
             request.state.user = payload
         except Exception as e:
-            logger.error(f'JWT verification failed for logout: {e}')
+            logger.warning('JWT verification failed for logout: %s', e)
             return JSONResponse({"detail": str(e)}, status_code=401)
         
         return await handle_logout(request)
@@ -38,11 +70,16 @@ async def auth_middleware(request: Request, call_next):
         try:
             payload = await verify_jwt(request)
             request.state.user = payload
-            logger.info(f'User set in request.state: {payload}')
+            logger.debug('User set in request.state: %s', payload.get('sub'))
         except Exception as e:
-            logger.error(f'JWT verification failed: {e}')
+            logger.warning('JWT verification failed: %s', e)
             return JSONResponse({"detail": str(e)}, status_code=401)
 
+    limited = await rate_limiter.check(request)
+    AUTH_DURATION.observe(time.perf_counter() - start, route_template(path))
+    if limited is not None:
+        return limited
+
     response = await call_next(request)
     return response
 
@@ -1,62 +1,99 @@
 import asyncio
-import httpx
-from fastapi import FastAPI
+import copy
+import gzip
+import hashlib
+import json
+from fastapi import FastAPI, Request
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from .services import SERVICE_URLS
+from .clients import service_clients
+from .compression import choose_encoding
 
 
-async def fetch_openapi(service_name: str, url: str, retries: int = 3, delay: int = 2):
+# Last good schema per service: {'etag': ..., 'hash': ..., 'schema': ...}
+_service_schemas: dict[str, dict] = {}
+
+
+async def fetch_openapi(service_name: str, url: str, retries: int = 3, delay: int = 2) -> bool:
+	# Returns True only when the service's schema differs from the one already held
 	for attempt in range(retries):
 		try:
-			async with httpx.AsyncClient(timeout=5.0) as client:
-				r = await client.get(f'{url}/openapi.json')
-				r.raise_for_status()
-				data = r.json()
-				new_paths = {f'/{service_name}{p}': v for p, v in data.get('paths', {}).items()}
-				for path, methods in new_paths.items():
-					for method_name, method_data in methods.items():
-						method_data['tags'] = [service_name.capitalize()]
-				data['paths'] = new_paths
-				return data
+			state = _service_schemas.get(service_name)
+			headers = {'If-None-Match': state['etag']} if state and state['etag'] else None
+			r = await service_clients.get(service_name).get(f'{url}/openapi.json', headers=headers, timeout=5.0)
+			if r.status_code == 304:
+				return False
+			r.raise_for_status()
+
+			# Not every backend sends an ETag, so fall back to comparing the body
+			digest = hashlib.sha256(r.content).hexdigest()
+			if state and state['hash'] == digest:
+				state['etag'] = r.headers.get('etag')
+				return False
+
+			data = r.json()
+			new_paths = {f'/{service_name}{p}': v for p, v in data.get('paths', {}).items()}
+			for path, methods in new_paths.items():
+				for method_name, method_data in methods.items():
+					method_data['tags'] = [service_name.capitalize()]
+					method_data['security'] = [{'BearerAuth': []}]
+			data['paths'] = new_paths
+			_service_schemas[service_name] = {'etag': r.headers.get('etag'), 'hash': digest, 'schema': data}
+			return True
 		except Exception:
 			await asyncio.sleep(delay)
-	return None
+	return False
 
 
-async def merge_openapi_schemas(app: FastAPI):
-	merged = get_openapi(title='Gateway API', version='1.0.0', routes=app.routes)
+def merge_openapi_schemas(base: dict) -> dict:
+	merged = copy.deepcopy(base)
 	merged['paths'] = {}
 
-	schemas = await asyncio.gather(
-		*[fetch_openapi(name, url) for name, url in SERVICE_URLS.items()]
-	)
-
-	for schema in schemas:
-		if schema:
-			merged['paths'].update(schema.get('paths', {}))
-			if 'components' in schema:
-				components = merged.setdefault('components', {})
-				for key, value in schema['components'].items():
-					components.setdefault(key, {}).update(value)
+	for name in SERVICE_URLS:
+		state = _service_schemas.get(name)
+		if state is None:
+			continue
+		schema = state['schema']
+		merged['paths'].update(schema.get('paths', {}))
+		if 'components' in schema:
+			components = merged.setdefault('components', {})
+			for key, value in schema['components'].items():
+				components.setdefault(key, {}).update(value)
 
 	merged.setdefault('components', {}).setdefault('securitySchemes', {})['BearerAuth'] = {
 		'type': 'http',
 		'scheme': 'bearer',
 		'bearerFormat': 'JWT'
 	}
-	for path in merged['paths'].values():
-		for method in path.values():
-			method['security'] = [{'BearerAuth': []}]
-
 	return merged
 
 
+async def refresh_openapi(app: FastAPI):
+	changed = await asyncio.gather(
+		*[fetch_openapi(name, url) for name, url in SERVICE_URLS.items() if url]
+	)
+	if not any(changed) and getattr(app.state, 'merged_openapi_schema', None) is not None:
+		return
+
+	base = getattr(app.state, 'gateway_openapi_schema', None)
+	if base is None:
+		base = app.state.gateway_openapi_schema = get_openapi(title='Gateway API', version='1.0.0', routes=app.routes)
+
+	merged = merge_openapi_schemas(base)
+	# Serialize and compress once per change rather than on every /openapi.json hit
+	body = json.dumps(merged, separators=(',', ':')).encode()
+	app.state.merged_openapi_bytes = body
+	app.state.merged_openapi_gzip = gzip.compress(body)
+	app.state.merged_openapi_etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+	app.state.merged_openapi_schema = merged
+
+
 async def periodic_refresh(app: FastAPI, interval: int = 30):
 	while True:
 		try:
-			app.state.merged_openapi_schema = await merge_openapi_schemas(app)
+			await refresh_openapi(app)
 		except Exception:
 			pass
 		await asyncio.sleep(interval)
@@ -65,13 +102,26 @@ async def periodic_refresh(app: FastAPI, interval: int = 30):
 def setup_openapi(app: FastAPI, refresh_interval: int = 30):
 	@app.on_event('startup')
 	async def startup_event():
-		app.state.merged_openapi_schema = await merge_openapi_schemas(app)
+		await refresh_openapi(app)
 		asyncio.create_task(periodic_refresh(app, refresh_interval))
 
+	# FastAPI registers its own /openapi.json, which would re-encode the schema on every hit
+	app.router.routes = [route for route in app.router.routes if getattr(route, 'path', None) != '/openapi.json']
+
 	@app.get('/openapi.json', include_in_schema=False)
-	async def custom_openapi():
-		if getattr(app.state, 'merged_openapi_schema', None) is None:
+	async def custom_openapi(request: Request):
+		body = getattr(app.state, 'merged_openapi_bytes', None)
+		if body is None:
 			return JSONResponse({'error': 'OpenAPI schema not ready'}, status_code=503)
-		return JSONResponse(app.state.merged_openapi_schema)
+
+		etag = app.state.merged_openapi_etag
+		headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+		if request.headers.get('if-none-match') == etag:
+			return Response(status_code=304, headers=headers)
+		# Only the gzip copy is encoded ahead, and only sent when the client's q-values allow it
+		if choose_encoding(request.headers.get('accept-encoding'), ['gzip']) == 'gzip':
+			headers['Content-Encoding'] = 'gzip'
+			return Response(app.state.merged_openapi_gzip, media_type='application/json', headers=headers)
+		return Response(body, media_type='application/json', headers=headers)
 
 	app.openapi = lambda: getattr(app.state, 'merged_openapi_schema', None) or {}
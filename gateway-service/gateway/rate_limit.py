@@ -0,0 +1,169 @@
+# gateway/rate_limit.py
+import math
+import os
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .routes import RouteTable
+from .metrics import register_route_templates
+from .redis_client import redis_client
+from .logging import logger
+
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv('GATEWAY_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Bucket for every route without its own entry in RATE_LIMITS, in requests/second and burst size
+DEFAULT_RATE = float(os.getenv('GATEWAY_RATE_LIMIT_RATE', 20))
+DEFAULT_BURST = int(os.getenv('GATEWAY_RATE_LIMIT_BURST', 60))
+# Tokens a worker takes from Redis at once and may spend locally for LEASE_TTL seconds
+LEASE_SIZE = int(os.getenv('GATEWAY_RATE_LIMIT_LEASE_SIZE', 5))
+LEASE_TTL = float(os.getenv('GATEWAY_RATE_LIMIT_LEASE_TTL', 1.0))
+MAX_LOCAL_LEASES = 10000
+RATE_LIMIT_KEY_PREFIX = 'rate_limit:'
+
+# Per-route limits, applied per user (JWT sub) or per client IP for anonymous requests
+RATE_LIMITS = {
+    '/product/api/products/': {'rate': 10, 'burst': 30},
+    '/product/api/products/{product_id}': {'rate': 20, 'burst': 60},
+    '/shop/api/shops/': {'rate': 10, 'burst': 30},
+    '/order/api/orders-from-shopcart/': {'rate': 0.2, 'burst': 3},
+    '/user/api/user/login/': {'rate': 0.5, 'burst': 5},
+    '/user/api/user/register/': {'rate': 0.1, 'burst': 3},
+    '/user/api/user/password-reset/request/': {'rate': 0.05, 'burst': 2},
+}
+
+register_route_templates(RATE_LIMITS)
+_RATE_LIMIT_ROUTES = RouteTable(RATE_LIMITS)
+_DEFAULT_ROUTE = ('*', {'rate': DEFAULT_RATE, 'burst': DEFAULT_BURST})
+
+# Takes up to ARGV[3] tokens from the bucket in KEYS[1] after refilling it for the time
+# elapsed since the last call. Uses the Redis clock so workers do not need synced clocks.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+local retry_after = 0
+if granted == 0 then
+    retry_after = (1 - tokens) / rate
+end
+return {granted, tostring(retry_after)}
+"""
+
+
+class BucketStats:
+    __slots__ = ('allowed', 'rejected', 'local', 'redis_calls', 'errors')
+
+    def __init__(self):
+        self.allowed = 0
+        self.rejected = 0
+        self.local = 0
+        self.redis_calls = 0
+        self.errors = 0
+
+
+class RateLimiter:
+    def __init__(self):
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        # key -> [tokens, expires_at]
+        self._leases: OrderedDict[str, list] = OrderedDict()
+        self._stats: dict[str, BucketStats] = {}
+
+    def _identity(self, request: Request) -> str:
+        user = getattr(request.state, 'user', None)
+        if user:
+            user_id = user.get('sub') or user.get('user_id')
+            if user_id:
+                return f'user:{user_id}'
+        # The client address uvicorn took from X-Forwarded-For, when Traefik sent it (entrypoint.sh)
+        return f'ip:{request.client.host if request.client else "unknown"}'
+
+    async def check(self, request: Request) -> JSONResponse | None:
+        if not RATE_LIMIT_ENABLED:
+            return None
+
+        template, limit = _RATE_LIMIT_ROUTES.match(request.url.path) or _DEFAULT_ROUTE
+        return await self.check_key(template, self._identity(request), limit)
+
+    async def check_key(self, template: str, identity: str, limit: dict) -> JSONResponse | None:
+        # Bucket keyed by something other than the caller, e.g. the account a login is for
+        if not RATE_LIMIT_ENABLED:
+            return None
+
+        stats = self._stats.get(template)
+        if stats is None:
+            stats = self._stats[template] = BucketStats()
+        key = f'{RATE_LIMIT_KEY_PREFIX}{template}:{identity}'
+
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] > 0 and lease[1] > time.monotonic():
+            lease[0] -= 1
+            stats.allowed += 1
+            stats.local += 1
+            return None
+
+        rate, burst = limit['rate'], limit['burst']
+        # Small buckets are not leased out, otherwise one worker could hold the whole burst
+        batch = max(1, min(LEASE_SIZE, burst // 10))
+        stats.redis_calls += 1
+        try:
+            granted, retry_after = await self._script(keys=[key], args=[rate, burst, batch])
+        except Exception as e:
+            # Fail open: a Redis outage should not take the gateway down with it
+            stats.errors += 1
+            logger.error('Rate limit check failed: %s', e)
+            return None
+
+        granted = int(granted)
+        if granted > 0:
+            self._leases[key] = [granted - 1, time.monotonic() + LEASE_TTL]
+            self._leases.move_to_end(key)
+            while len(self._leases) > MAX_LOCAL_LEASES:
+                self._leases.popitem(last=False)
+            stats.allowed += 1
+            return None
+
+        stats.rejected += 1
+        retry_after = max(1, math.ceil(float(retry_after)))
+        return JSONResponse(
+            {'detail': 'Too many requests'},
+            status_code=429,
+            headers={
+                'Retry-After': str(retry_after),
+                'X-RateLimit-Limit': str(burst),
+            },
+        )
+
+    def stats(self) -> dict:
+        return {
+            template: {
+                'allowed': stats.allowed,
+                'rejected': stats.rejected,
+                'served_locally': stats.local,
+                'redis_calls': stats.redis_calls,
+                'errors': stats.errors,
+            }
+            for template, stats in self._stats.items()
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def setup_rate_limit(app: FastAPI):
+    @app.get('/gateway/stats/rate-limits', include_in_schema=False)
+    async def rate_limit_stats():
+        return rate_limiter.stats()
@@ -1,12 +1,17 @@
 import os
 from dotenv import load_dotenv
-import redis
+import redis.asyncio as redis
 
 
 load_dotenv()
 
-redis_client = redis.Redis(
-    host=os.getenv('REDIS_HOST'),  
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+
+redis_pool = redis.ConnectionPool(
+    host=os.getenv('REDIS_HOST'),
     port=os.getenv('REDIS_PORT'),
-    decode_responses=True  
-)
\ No newline at end of file
+    max_connections=REDIS_MAX_CONNECTIONS,
+    decode_responses=True
+)
+
+redis_client = redis.Redis(connection_pool=redis_pool)
@@ -0,0 +1,147 @@
+# gateway/resilience.py
+import time
+from collections import deque
+from fastapi import FastAPI
+
+from .services import SERVICE_URLS, SERVICE_SETTINGS
+from .logging import logger
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+LATENCY_WINDOW = 512
+# Percentiles are re-sorted every this many samples rather than on every request
+PERCENTILE_REFRESH = 32
+MIN_LATENCY_SAMPLES = 50
+TIMEOUT_MULTIPLIER = 3.0
+
+
+class ServiceUnavailable(Exception):
+    def __init__(self, service: str, reason: str, retry_after: int | None = None):
+        super().__init__(f'{service} {reason}')
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._sorted = []
+        self._pending = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._pending += 1
+
+    def percentile(self, q: float) -> float | None:
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        if self._pending >= PERCENTILE_REFRESH or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._pending = 0
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class ServiceGuard:
+    def __init__(self, service: str, settings: dict):
+        self.service = service
+        self.max_timeout = settings['timeout']
+        self.min_timeout = settings['min_timeout']
+        self.max_concurrency = settings['max_concurrency']
+        self.failure_threshold = settings['failure_threshold']
+        self.recovery_time = settings['recovery_time']
+
+        self.latency = LatencyTracker()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.probe_in_flight = False
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected_open = 0
+        self.rejected_busy = 0
+
+    def timeout(self) -> float:
+        p99 = self.latency.percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * TIMEOUT_MULTIPLIER))
+
+    def admit(self) -> float:
+        # Returns the timeout to use for this call, or raises ServiceUnavailable
+        if self.state == OPEN:
+            remaining = self.opened_at + self.recovery_time - time.monotonic()
+            if remaining > 0:
+                self.rejected_open += 1
+                raise ServiceUnavailable(self.service, 'circuit open', retry_after=int(remaining) + 1)
+            self.state = HALF_OPEN
+            logger.info('Circuit for %s half-open, sending probe', self.service)
+
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                self.rejected_open += 1
+                raise ServiceUnavailable(self.service, 'circuit half-open', retry_after=1)
+            self.probe_in_flight = True
+        elif self.in_flight >= self.max_concurrency:
+            self.rejected_busy += 1
+            raise ServiceUnavailable(self.service, 'at concurrency limit', retry_after=1)
+
+        self.in_flight += 1
+        return self.timeout()
+
+    def release(self, success: bool | None, elapsed: float):
+        # success is None when the caller was cancelled before the upstream answered
+        self.in_flight -= 1
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+
+        if success is None:
+            return
+        if success:
+            self.successes += 1
+            self.latency.record(elapsed)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                logger.info('Circuit for %s closed', self.service)
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning('Circuit for %s opened after %d failures', self.service, self.consecutive_failures)
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'timeout': self.timeout(),
+            'p50': self.latency.percentile(0.5),
+            'p95': self.latency.percentile(0.95),
+            'p99': self.latency.percentile(0.99),
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'rejected_open': self.rejected_open,
+            'rejected_busy': self.rejected_busy,
+        }
+
+
+service_guards = {
+    service: ServiceGuard(service, SERVICE_SETTINGS[service]) for service in SERVICE_URLS
+}
+
+
+def setup_resilience(app: FastAPI):
+    @app.get('/gateway/stats/services', include_in_schema=False)
+    async def service_stats():
+        return {service: guard.stats() for service, guard in service_guards.items()}
@@ -0,0 +1,51 @@
+# gateway/routes.py
+
+
+class _RouteNode:
+    __slots__ = ('children', 'param', 'route')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.route = None
+
+
+# Path templates such as '/product/api/products/{product_id}' compiled into a segment
+# trie, so a lookup costs the depth of the path rather than the size of the table.
+class RouteTable:
+    def __init__(self, routes: dict | None = None):
+        self._root = _RouteNode()
+        for template, value in (routes or {}).items():
+            self.add(template, value)
+
+    def add(self, template: str, value):
+        node = self._root
+        for segment in template.split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.param is None:
+                    node.param = _RouteNode()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        # Templates of the same shape keep the first one, like a first-match scan would
+        if node.route is None:
+            node.route = (template, value)
+
+    def match(self, path: str):
+        return self._match(self._root, path.split('/'), 0)
+
+    def _match(self, node: _RouteNode, segments: list, index: int):
+        if index == len(segments):
+            return node.route
+
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            route = self._match(child, segments, index + 1)
+            if route is not None:
+                return route
+
+        # Path parameters match any non-empty segment
+        if node.param is not None and segment:
+            return self._match(node.param, segments, index + 1)
+        return None
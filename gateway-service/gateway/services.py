@@ -13,12 +13,89 @@ WISHLIST_SERVICE = os.getenv('WISHLIST_SERVICE')
 ANALYTIC_SERVICE = os.getenv('ANALYTIC_SERVICE')
 
 
+def parse_upstream_urls(value: str | None) -> list[str]:
+    # A service may list several replicas, e.g. PRODUCT_SERVICE=http://product-1:8000,http://product-2:8000
+    return [url.strip().rstrip('/') for url in (value or '').split(',') if url.strip()]
+
+
+SERVICE_UPSTREAMS = {
+    'user': parse_upstream_urls(USER_SERVICE),
+    'shop': parse_upstream_urls(SHOP_SERVICE),
+    'product': parse_upstream_urls(PRODUCT_SERVICE),
+    'cart': parse_upstream_urls(SHOPCART_SERVICE),
+    'order': parse_upstream_urls(ORDER_SERVICE),
+    'wishlist': parse_upstream_urls(WISHLIST_SERVICE),
+    'analytic': parse_upstream_urls(ANALYTIC_SERVICE),
+}
+
+# First replica of each service, for calls that are not load balanced (OpenAPI, login)
 SERVICE_URLS = {
-    'user': USER_SERVICE,
-    'shop': SHOP_SERVICE,
-    'product': PRODUCT_SERVICE,
-    'cart': SHOPCART_SERVICE,
-    'order': ORDER_SERVICE,
-    'wishlist': WISHLIST_SERVICE,
-    'analytic': ANALYTIC_SERVICE,
+    name: urls[0] if urls else None for name, urls in SERVICE_UPSTREAMS.items()
+}
+
+SERVICE_ENV_PREFIXES = {
+    'user': 'USER_SERVICE',
+    'shop': 'SHOP_SERVICE',
+    'product': 'PRODUCT_SERVICE',
+    'cart': 'SHOPCART_SERVICE',
+    'order': 'ORDER_SERVICE',
+    'wishlist': 'WISHLIST_SERVICE',
+    'analytic': 'ANALYTIC_SERVICE',
+}
+
+
+# Per-service defaults, overridable per service, e.g. PRODUCT_SERVICE_MAX_CONNECTIONS=200
+DEFAULT_MAX_CONNECTIONS = int(os.getenv('GATEWAY_MAX_CONNECTIONS', 100))
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('GATEWAY_MAX_KEEPALIVE_CONNECTIONS', 20))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv('GATEWAY_KEEPALIVE_EXPIRY', 30.0))
+DEFAULT_HTTP2 = os.getenv('GATEWAY_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+DEFAULT_STREAMING = os.getenv('GATEWAY_STREAMING', 'false').lower() in ('1', 'true', 'yes')
+DEFAULT_TIMEOUT = float(os.getenv('GATEWAY_TIMEOUT', 30.0))
+DEFAULT_MIN_TIMEOUT = float(os.getenv('GATEWAY_MIN_TIMEOUT', 5.0))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('GATEWAY_MAX_CONCURRENCY', 100))
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv('GATEWAY_FAILURE_THRESHOLD', 5))
+DEFAULT_RECOVERY_TIME = float(os.getenv('GATEWAY_RECOVERY_TIME', 30.0))
+DEFAULT_LB_STRATEGY = os.getenv('GATEWAY_LB_STRATEGY', 'least_outstanding')
+DEFAULT_HEALTH_PATH = os.getenv('GATEWAY_HEALTH_PATH', '/')
+DEFAULT_HEDGE = os.getenv('GATEWAY_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+DEFAULT_HEDGE_BUDGET = float(os.getenv('GATEWAY_HEDGE_BUDGET', 0.05))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _service_settings(prefix: str) -> dict:
+    return {
+        'max_connections': int(os.getenv(f'{prefix}_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)),
+        'max_keepalive_connections': int(
+            os.getenv(f'{prefix}_MAX_KEEPALIVE_CONNECTIONS', DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+        ),
+        'keepalive_expiry': float(os.getenv(f'{prefix}_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)),
+        'http2': _env_bool(f'{prefix}_HTTP2', DEFAULT_HTTP2),
+        'streaming': _env_bool(f'{prefix}_STREAMING', DEFAULT_STREAMING),
+        # Upper and lower bound for the latency-derived upstream timeout
+        'timeout': float(os.getenv(f'{prefix}_TIMEOUT', DEFAULT_TIMEOUT)),
+        'min_timeout': float(os.getenv(f'{prefix}_MIN_TIMEOUT', DEFAULT_MIN_TIMEOUT)),
+        # Bulkhead: in-flight requests per worker before failing fast
+        'max_concurrency': int(os.getenv(f'{prefix}_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+        # Circuit breaker: consecutive failures before opening, seconds before a probe
+        'failure_threshold': int(os.getenv(f'{prefix}_FAILURE_THRESHOLD', DEFAULT_FAILURE_THRESHOLD)),
+        'recovery_time': float(os.getenv(f'{prefix}_RECOVERY_TIME', DEFAULT_RECOVERY_TIME)),
+        # Replica selection: round_robin, least_outstanding or ewma
+        'lb_strategy': os.getenv(f'{prefix}_LB_STRATEGY', DEFAULT_LB_STRATEGY).lower(),
+        # Probed on every replica; anything below 500 counts as healthy
+        'health_path': os.getenv(f'{prefix}_HEALTH_PATH', DEFAULT_HEALTH_PATH),
+        # Hedging: GETs still unanswered at the service's p95 are sent to a second replica.
+        # The budget is the share of a route's requests that may be hedged.
+        'hedge': _env_bool(f'{prefix}_HEDGE', DEFAULT_HEDGE),
+        'hedge_budget': float(os.getenv(f'{prefix}_HEDGE_BUDGET', DEFAULT_HEDGE_BUDGET)),
+    }
+
+
+SERVICE_SETTINGS = {
+    name: _service_settings(prefix) for name, prefix in SERVICE_ENV_PREFIXES.items()
 }
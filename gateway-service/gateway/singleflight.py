@@ -0,0 +1,32 @@
+# gateway/singleflight.py
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn):
+        # Concurrent callers with the same key share one in-flight call to fn().
+        # The call runs as its own task so a caller that goes away does not cancel it for the rest.
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            return await asyncio.shield(task)
+
+        self.leaders += 1
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        calls = self.leaders + self.followers
+        return {
+            'in_flight': len(self._calls),
+            'upstream_calls': self.leaders,
+            'coalesced_calls': self.followers,
+            'collapse_ratio': self.followers / calls if calls else 0.0,
+        }
@@ -0,0 +1,142 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueListener
+
+from .logging import DeferredQueueHandler
+
+
+# W3C trace context, https://www.w3.org/TR/trace-context/. The gateway starts a trace
+# per request and hands its traceparent to the services, which continue it. Spans are
+# written as JSON lines to GATEWAY_TRACE_FILE (tail it into a collector); when unset
+# only the header is propagated.
+TRACE_FILE = os.getenv('GATEWAY_TRACE_FILE')
+TRACE_SAMPLE_RATE = float(os.getenv('GATEWAY_TRACE_SAMPLE_RATE', 1.0))
+# A public client could otherwise force every request into the trace file
+TRACE_ACCEPT_INCOMING = os.getenv('GATEWAY_TRACE_ACCEPT_INCOMING', 'false').lower() in ('1', 'true', 'yes')
+TRACE_QUEUE_SIZE = int(os.getenv('GATEWAY_TRACE_QUEUE_SIZE', 10000))
+SERVICE_NAME = 'gateway'
+
+current_span: ContextVar['Span | None'] = ContextVar('current_span', default=None)
+
+
+def parse_traceparent(value) -> tuple[str, str, bool] | None:
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    parts = value.strip().lower().split('-')
+    if len(parts) < 4 or parts[0] == 'ff' or (parts[0] == '00' and len(parts) != 4):
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if len(version) != 2 or len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        sampled = bool(int(flags, 16) & 1)
+        if int(trace_id, 16) == 0 or int(parent_id, 16) == 0:
+            return None
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'sampled', 'attributes', 'start', '_started')
+
+    def __init__(self, name, kind, trace_id, parent_id, sampled, attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}'
+
+    def end(self):
+        if not self.sampled or not TRACE_FILE:
+            return
+        span_logger.info({
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'service': SERVICE_NAME,
+            'start': self.start,
+            'duration_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'attributes': self.attributes,
+        })
+
+
+def start_span(name: str, kind: str = 'internal', traceparent=None, **attributes) -> Span:
+    parent = parse_traceparent(traceparent)
+    current = current_span.get()
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    elif current is not None:
+        trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+    else:
+        trace_id, parent_id, sampled = os.urandom(16).hex(), None, random.random() < TRACE_SAMPLE_RATE
+    return Span(name, kind, trace_id, parent_id, sampled, attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = 'internal', traceparent=None, **attributes):
+    current = start_span(name, kind, traceparent, **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.attributes['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        current_span.reset(token)
+        current.end()
+
+
+def request_traceparent(request) -> str | None:
+    return request.headers.get('traceparent') if TRACE_ACCEPT_INCOMING else None
+
+
+def current_traceparent() -> str | None:
+    current = current_span.get()
+    return current.traceparent if current is not None else None
+
+
+def inject(headers: dict | None = None) -> dict:
+    headers = {} if headers is None else headers
+    current = current_span.get()
+    if current is not None:
+        headers['traceparent'] = current.traceparent
+    return headers
+
+
+class SpanFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, default=str)
+
+
+span_logger = logging.getLogger('gateway.spans')
+span_logger.setLevel(logging.INFO)
+span_logger.propagate = False
+
+if TRACE_FILE:
+    span_handler = logging.FileHandler(TRACE_FILE)
+    span_handler.setFormatter(SpanFormatter())
+    span_queue = queue.Queue(TRACE_QUEUE_SIZE)
+    span_listener = QueueListener(span_queue, span_handler)
+    span_listener.start()
+    atexit.register(span_listener.stop)
+    span_logger.addHandler(DeferredQueueHandler(span_queue))
@@ -0,0 +1,54 @@
+import asyncio
+import os
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+# The gateway reads its settings when it is imported. Upstreams are never contacted,
+# every service client is swapped for a mock transport below.
+os.environ.setdefault('USER_SERVICE', 'http://user:8000')
+os.environ.setdefault('SHOP_SERVICE', 'http://shop:8000')
+os.environ.setdefault('PRODUCT_SERVICE', 'http://product:8000')
+os.environ.setdefault('JWT_SECRET', 'test-secret')
+os.environ.setdefault('JWT_ALGORITHM', 'HS256')
+# Rate limiting is the only Redis call on a public request
+os.environ.setdefault('GATEWAY_RATE_LIMIT_ENABLED', 'false')
+
+from gateway.main import app  # noqa: E402
+from gateway.cache import response_cache  # noqa: E402
+from gateway.clients import service_clients  # noqa: E402
+from gateway.services import SERVICE_URLS  # noqa: E402
+
+
+class Upstream:
+    def __init__(self):
+        self.requests = []
+        self.handler = lambda request: httpx.Response(200, json={})
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.handler(request)
+
+    @property
+    def urls(self) -> list[str]:
+        return [str(request.url) for request in self.requests]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    mock = Upstream()
+    clients = {service: httpx.AsyncClient(transport=httpx.MockTransport(mock)) for service in SERVICE_URLS}
+    monkeypatch.setattr(service_clients, '_clients', clients)
+    monkeypatch.setattr(response_cache, '_entries', OrderedDict())
+    return mock
+
+
+@pytest.fixture
+def gateway():
+    def request(method: str, url: str, **kwargs) -> httpx.Response:
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://gateway') as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+    return request
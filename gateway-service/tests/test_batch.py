@@ -0,0 +1,26 @@
+def test_item_cannot_set_credentials_or_gateway_headers(upstream, gateway):
+    forged = {
+        'Authorization': 'Bearer forged',
+        'Cookie': 'sessionid=forged',
+        'Host': 'internal.example',
+        'X-Gateway-Admin-Token': 'forged',
+        'X-User-Id': 'someone-else',
+        'Traceparent': '00-' + '1' * 32 + '-' + '2' * 16 + '-01',
+        'Accept-Language': 'az',
+    }
+
+    response = gateway('POST', '/batch', json={'requests': [
+        {'path': '/shop/api/shops/', 'headers': forged},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()['responses'][0]['status'] == 200
+    sent = upstream.requests[0].headers
+    assert 'authorization' not in sent
+    assert 'cookie' not in sent
+    assert 'x-gateway-admin-token' not in sent
+    assert 'x-user-id' not in sent
+    assert sent['host'] == 'shop:8000'
+    assert sent.get('traceparent') != forged['Traceparent']
+    # Anything else is the item's to set
+    assert sent['accept-language'] == 'az'
@@ -0,0 +1,44 @@
+import httpx
+
+from gateway import cache
+from gateway.services import SERVICE_SETTINGS
+
+
+def echo_query(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={'query': request.url.query.decode()})
+
+
+def test_query_string_reaches_upstream(upstream, gateway):
+    upstream.handler = echo_query
+
+    first = gateway('GET', '/product/api/products/?page=1')
+    second = gateway('GET', '/product/api/products/?page=2')
+
+    assert upstream.urls == [
+        'http://product:8000/api/products/?page=1',
+        'http://product:8000/api/products/?page=2',
+    ]
+    assert first.json() == {'query': 'page=1'}
+    assert second.json() == {'query': 'page=2'}
+
+
+def test_cached_query_is_served_per_query(upstream, gateway):
+    upstream.handler = echo_query
+
+    gateway('GET', '/product/api/products/?page=2&limit=5')
+    hit = gateway('GET', '/product/api/products/?limit=5&page=2')
+
+    assert len(upstream.requests) == 1
+    assert hit.headers['x-cache'] == 'HIT'
+    assert hit.json() == {'query': 'page=2&limit=5'}
+
+
+def test_streamed_request_keeps_query_string(upstream, gateway, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_ENABLED', False)
+    monkeypatch.setitem(SERVICE_SETTINGS['product'], 'streaming', True)
+    upstream.handler = echo_query
+
+    response = gateway('GET', '/product/api/products/?page=3')
+
+    assert upstream.urls == ['http://product:8000/api/products/?page=3']
+    assert response.json() == {'query': 'page=3'}
@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+
+from gateway.metrics import _serve_metrics
+
+
+def scrape(path: str) -> httpx.Response:
+    async def get():
+        server = await asyncio.start_server(_serve_metrics, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with httpx.AsyncClient() as client:
+                return await client.get(f'http://127.0.0.1:{port}{path}')
+        finally:
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(get())
+
+
+def test_metrics_on_internal_listener(upstream, gateway):
+    gateway('GET', '/shop/api/shops/')
+
+    response = scrape('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert 'gateway_request_duration_seconds_count' in response.text
+
+
+def test_internal_listener_only_serves_metrics():
+    assert scrape('/gateway/stats/cache').status_code == 404
+
+
+def test_metrics_not_public_on_gateway(gateway):
+    assert gateway('GET', '/metrics').status_code == 401
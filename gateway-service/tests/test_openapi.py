@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from gateway.main import app
+from gateway.openapi import refresh_openapi
+
+
+@pytest.fixture
+def schema(upstream):
+    asyncio.run(refresh_openapi(app))
+    return app.state.merged_openapi_bytes
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip', 'deflate, gzip;q=0.5', 'br, *'])
+def test_gzip_when_accepted(schema, gateway, accept_encoding):
+    response = gateway('GET', '/openapi.json', headers={'Accept-Encoding': accept_encoding})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    # httpx has already decoded the body
+    assert response.content == schema
+
+
+@pytest.mark.parametrize('accept_encoding', ['identity', 'gzip;q=0', 'x-gzip', 'br, gzip;q=0, *'])
+def test_identity_when_gzip_refused(schema, gateway, accept_encoding):
+    response = gateway('GET', '/openapi.json', headers={'Accept-Encoding': accept_encoding})
+
+    assert 'content-encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert response.content == schema
@@ -0,0 +1,32 @@
+import httpx
+
+
+def paginated(request: httpx.Request) -> httpx.Response:
+    # Two pages: the first hands out a cursor, the second is only served for it
+    cursor = request.url.params.get('cursor')
+    if cursor is None:
+        return httpx.Response(200, json=[1, 2], headers={'X-Next-Cursor': 'opaque-2'})
+    assert cursor == 'opaque-2'
+    return httpx.Response(200, json=[3])
+
+
+def test_cursor_round_trips_through_gateway(upstream, gateway):
+    upstream.handler = paginated
+
+    first = gateway('GET', '/product/api/products/?limit=2')
+    cursor = first.headers['x-next-cursor']
+    second = gateway('GET', '/product/api/products/', params={'limit': 2, 'cursor': cursor})
+
+    assert first.json() == [1, 2]
+    assert second.json() == [3]
+    assert 'x-next-cursor' not in second.headers
+    assert upstream.urls[-1] == 'http://product:8000/api/products/?limit=2&cursor=opaque-2'
+
+
+def test_next_cursor_exposed_to_browsers(upstream, gateway):
+    upstream.handler = paginated
+
+    response = gateway('GET', '/product/api/products/', headers={'Origin': 'http://localhost:3000'})
+
+    exposed = response.headers['access-control-expose-headers'].lower()
+    assert 'x-next-cursor' in exposed
@@ -0,0 +1,40 @@
+import httpx
+import pytest
+
+PRODUCT_ID = '0b7e4c1e-9a4f-4c1b-8d0e-3f2a1b5c6d7e'
+
+
+@pytest.mark.parametrize('path', [
+    f'/product/api/products/{PRODUCT_ID}/full',
+    f'/product/api/products/{PRODUCT_ID}/variations/ratings/',
+])
+def test_anonymous_get_reaches_product_service(upstream, gateway, path):
+    response = gateway('GET', path)
+
+    assert response.status_code == 200
+    assert upstream.urls == [f'http://product:8000{path.removeprefix("/product")}']
+
+
+def test_product_full_is_cached(upstream, gateway):
+    path = f'/product/api/products/{PRODUCT_ID}/full'
+
+    gateway('GET', path)
+    response = gateway('GET', path)
+
+    assert response.headers['x-cache'] == 'HIT'
+    assert len(upstream.requests) == 1
+
+
+def test_anonymous_search_keeps_its_filters(upstream, gateway):
+    upstream.handler = lambda request: httpx.Response(200, json={'items': [request.url.query.decode()]})
+    search = '/product/api/products/search/'
+
+    shoes = gateway('GET', search, params={'q': 'shoes', 'size': ['40', '41'], 'limit': 10})
+    bags = gateway('GET', search, params={'q': 'bags', 'on_sale': 'true'})
+
+    assert shoes.status_code == bags.status_code == 200
+    assert upstream.urls == [
+        'http://product:8000/api/products/search/?q=shoes&size=40&size=41&limit=10',
+        'http://product:8000/api/products/search/?q=bags&on_sale=true',
+    ]
+    assert shoes.json() != bags.json()
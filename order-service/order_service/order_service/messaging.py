@@ -3,6 +3,7 @@ import json
 import os
 import logging
 from dotenv import load_dotenv
+from .tracing import span
 
 load_dotenv()
 logger = logging.getLogger('order_service')
@@ -61,15 +62,17 @@ class RabbitMQPublisher:
                     'variation_data': item.get('variation_data')
                 }
 
-                channel.basic_publish(
-                    exchange='order_events',
-                    routing_key='order.item_variation',
-                    body=json.dumps(message),
-                    properties=pika.BasicProperties(
-                        delivery_mode=2,
-                        content_type='application/json'
+                with span('publish order.item_variation', 'producer', exchange='order_events') as current:
+                    channel.basic_publish(
+                        exchange='order_events',
+                        routing_key='order.item_variation',
+                        body=json.dumps(message),
+                        properties=pika.BasicProperties(
+                            delivery_mode=2,
+                            content_type='application/json',
+                            headers={'traceparent': current.traceparent}
+                        )
                     )
-                )
 
                 logger.info(f"published order.item_variation event | order={order_id} shop={item['shop_id']} item={item['item_id']}")
             
@@ -101,15 +104,17 @@ class RabbitMQPublisher:
                 'created_at': created_at
             }
 
-            channel.basic_publish(
-                exchange='order_events',
-                routing_key='order.created',
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                    content_type='application/json'
+            with span('publish order.created', 'producer', exchange='order_events') as current:
+                channel.basic_publish(
+                    exchange='order_events',
+                    routing_key='order.created',
+                    body=json.dumps(message),
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,
+                        content_type='application/json',
+                        headers={'traceparent': current.traceparent}
+                    )
                 )
-            )
 
             logger.info(
                 f"published order.created event | order={order_id} user={user_id}"
@@ -4,6 +4,7 @@ import logging
 from typing import Optional
 from rest_framework.exceptions import APIException
 from dotenv import load_dotenv
+from order_service.tracing import TracingTransport
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -37,7 +38,7 @@ class AnalyticServiceClient:
 
         url = f"{self.base_url}/api/orders/"
         try:
-            with httpx.Client(timeout=self.timeout, follow_redirects=True) as client:
+            with httpx.Client(timeout=self.timeout, follow_redirects=True, transport=TracingTransport()) as client:
                 response = client.post(url, json=payload)
             
             if response.status_code == 201 or response.status_code == 200:
@@ -3,6 +3,7 @@ import os
 from typing import Optional
 from rest_framework.exceptions import APIException
 from dotenv import load_dotenv
+from order_service.tracing import TracingTransport
 
 load_dotenv()
 
@@ -17,7 +18,7 @@ class ProductServiceClient:
     def get_variation(self, variation_id: str) -> Optional[dict]:
         url = f'{self.base_url}/api/products/variations/{variation_id}'
         try:
-            with httpx.Client(timeout=self.timeout, follow_redirects=True) as client:
+            with httpx.Client(timeout=self.timeout, follow_redirects=True, transport=TracingTransport()) as client:
                 response = client.get(
                     url,
                     headers={
@@ -41,7 +42,7 @@ class ProductServiceClient:
         url = f'{self.base_url}/api/products/{product_id}'
         
         try:
-            with httpx.Client(timeout=self.timeout, follow_redirects=True) as client:
+            with httpx.Client(timeout=self.timeout, follow_redirects=True, transport=TracingTransport()) as client:
                 response = client.get(
                     url,
                     headers={
@@ -3,6 +3,7 @@ import os
 from typing import List
 from rest_framework.exceptions import APIException
 from dotenv import load_dotenv
+from order_service.tracing import TracingTransport
 
 load_dotenv()
 
@@ -20,7 +21,7 @@ class ShopServiceClient:
 
         url = f'{self.base_url}/api/user/{user_id}/'
         try:
-            with httpx.Client(timeout=self.timeout, follow_redirects=True) as client:
+            with httpx.Client(timeout=self.timeout, follow_redirects=True, transport=TracingTransport()) as client:
                 response = client.get(
                     url,
                     headers={
@@ -5,6 +5,7 @@ from typing import Optional
 from rest_framework import status
 from rest_framework.exceptions import  APIException
 from dotenv import load_dotenv
+from order_service.tracing import TracingTransport
 
 
 logger = logging.getLogger(__name__)
@@ -23,7 +24,7 @@ class ShopCartServiceDataCheck:
         url = f'{self.base_url}/shopcart/api/mycart/'
         
         try:
-            with httpx.Client(timeout=self.timeout, follow_redirects=True) as client:
+            with httpx.Client(timeout=self.timeout, follow_redirects=True, transport=TracingTransport()) as client:
                 response = client.get(
                     url,
                     headers={
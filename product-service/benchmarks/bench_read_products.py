@@ -0,0 +1,120 @@
+# Throughput of GET /api/products/ with the async session against the previous
+# sync Session, whose `def` route ran on Starlette's threadpool.
+#
+# Needs a database with the schema applied (alembic upgrade head). Run from
+# product-service/:  python -m benchmarks.bench_read_products
+#
+# BENCH_PRODUCTS rows are inserted first if the table has fewer. Both variants
+# use the pool settings from core/config.py and are driven in-process through
+# httpx.ASGITransport, BENCH_CONCURRENCY requests at a time.
+import asyncio
+import os
+import statistics
+import time
+from decimal import Decimal
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.app.core.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+)
+from src.app.core.db import SessionLocal
+from src.app.api.v1.routes import router
+from src.app.models.v1 import Product as ProductModel
+from src.app.schemas.v1.product import Product
+
+
+PRODUCTS = int(os.getenv('BENCH_PRODUCTS', 1000))
+REQUESTS = int(os.getenv('BENCH_REQUESTS', 2000))
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', 64))
+PAGE_SIZE = int(os.getenv('BENCH_PAGE_SIZE', 20))
+
+sync_engine = create_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+
+def get_sync_db():
+    db = SyncSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+sync_app = FastAPI()
+
+
+@sync_app.get('/api/products/', response_model=List[Product])
+def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_sync_db)):
+    return db.query(ProductModel).offset(skip).limit(limit).all()
+
+
+async_app = FastAPI()
+async_app.include_router(router, prefix='/api')
+
+
+async def seed():
+    async with SessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(ProductModel))
+        missing = PRODUCTS - existing
+        for start in range(0, max(missing, 0), 1000):
+            db.add_all(
+                ProductModel(title=f'Bench product {existing + i}', about='Seeded by bench_read_products', base_price=Decimal('9.99'))
+                for i in range(start, min(start + 1000, missing))
+            )
+            await db.commit()
+        return max(existing, PRODUCTS)
+
+
+async def run(app: FastAPI) -> tuple[float, list[float]]:
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(REQUESTS):
+        queue.put_nowait(i * PAGE_SIZE % max(PRODUCTS - PAGE_SIZE, 1))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        async def worker():
+            while not queue.empty():
+                skip = queue.get_nowait()
+                start = time.perf_counter()
+                resp = await client.get('/api/products/', params={'skip': skip, 'limit': PAGE_SIZE})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        # Warm up the pools before timing
+        await asyncio.gather(*[client.get('/api/products/', params={'limit': PAGE_SIZE}) for _ in range(CONCURRENCY)])
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+        return time.perf_counter() - start, latencies
+
+
+async def main():
+    rows = await seed()
+    print(f'{rows} products, {REQUESTS} requests of {PAGE_SIZE}, concurrency {CONCURRENCY}, pool {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}')
+    print(f'{"":>6} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8}')
+    for name, app in (('sync', sync_app), ('async', async_app)):
+        elapsed, latencies = await run(app)
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f'{name:>6} {REQUESTS / elapsed:>9.0f} {p50:>8.2f} {p99:>8.2f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
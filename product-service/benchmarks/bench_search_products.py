@@ -0,0 +1,165 @@
+# Latency of GET /api/products/search/ on a synthetic catalogue.
+#
+# Needs PostgreSQL with the schema applied (alembic upgrade head). Run from
+# product-service/:  python -m benchmarks.bench_search_products
+#
+# Products with SKUs starting BENCH- are topped up to BENCH_PRODUCTS (one million by
+# default) in batches of INSERT ... SELECT, each with BENCH_VARIATIONS variations
+# and one of BENCH_CATEGORIES categories, then the tables are analyzed. Each query
+# in QUERIES is sent BENCH_REQUESTS times, BENCH_CONCURRENCY at a time, through
+# httpx.ASGITransport: the first page with facets, and the next page by cursor.
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select, text
+
+from src.app.core.db import engine, SessionLocal
+from src.app.api.v1.routes import router
+from src.app.models.v1 import Category
+
+
+PRODUCTS = int(os.getenv('BENCH_PRODUCTS', 1_000_000))
+VARIATIONS = int(os.getenv('BENCH_VARIATIONS', 3))
+CATEGORIES = int(os.getenv('BENCH_CATEGORIES', 50))
+BATCH = int(os.getenv('BENCH_BATCH', 50_000))
+REQUESTS = int(os.getenv('BENCH_REQUESTS', 200))
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', 16))
+PAGE_SIZE = int(os.getenv('BENCH_PAGE_SIZE', 20))
+
+WORDS = [
+    'leather', 'cotton', 'wool', 'linen', 'denim', 'silk', 'suede', 'canvas', 'jacket', 'shirt',
+    'dress', 'skirt', 'boots', 'sneakers', 'sandals', 'scarf', 'hat', 'belt', 'bag', 'wallet',
+    'classic', 'slim', 'relaxed', 'vintage', 'sport', 'casual', 'formal', 'summer', 'winter', 'waterproof',
+    'lightweight', 'warm', 'soft', 'stretch', 'organic', 'recycled', 'handmade', 'premium', 'everyday', 'travel',
+    'running', 'hiking', 'office', 'evening', 'beach', 'street', 'urban', 'outdoor', 'kids', 'unisex',
+]
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL', '38', '39', '40', '41', '42', '43', '44']
+COLORS = ['black', 'white', 'red', 'blue', 'green', 'brown', 'grey', 'beige', 'navy', 'pink']
+
+# Title of three words and a twelve word description from WORDS, prices from 5 to 500
+SEED_BATCH = text("""
+    WITH new AS (
+        INSERT INTO products (id, title, about, sku, base_price, on_sale, top_sale, top_popular, is_active, created_at)
+        SELECT
+            gen_random_uuid(),
+            initcap(array_to_string(ARRAY(SELECT w[1 + floor(random() * cardinality(w))::int] FROM generate_series(1, 3 + 0 * i)), ' ')),
+            array_to_string(ARRAY(SELECT w[1 + floor(random() * cardinality(w))::int] FROM generate_series(1, 12 + 0 * i)), ' '),
+            'BENCH-' || i,
+            round((5 + random() * 495)::numeric, 2),
+            random() < 0.2,
+            random() < 0.05,
+            random() < 0.05,
+            true,
+            now() - i * interval '1 second'
+        FROM generate_series(CAST(:start AS int), CAST(:stop AS int) - 1) AS i, CAST(:words AS text[]) AS w
+        RETURNING id, base_price
+    ), categorised AS (
+        INSERT INTO product_categories (product_id, category_id)
+        SELECT id, c[1 + floor(random() * cardinality(c))::int] FROM new, CAST(:categories AS uuid[]) AS c
+    )
+    INSERT INTO product_variations (id, product_id, size, color, count, amount, amount_limit, price)
+    SELECT
+        gen_random_uuid(), new.id,
+        s[1 + floor(random() * cardinality(s))::int],
+        k[1 + floor(random() * cardinality(k))::int],
+        0, 10, 0,
+        round(new.base_price * (0.8 + random() * 0.4)::numeric, 2)
+    FROM new, generate_series(1, CAST(:variations AS int)), CAST(:sizes AS text[]) AS s, CAST(:colors AS text[]) AS k
+""")
+
+# (name, query parameters)
+QUERIES = [
+    ('text', {'q': 'leather jacket'}),
+    ('text rare', {'q': 'waterproof handmade sandals'}),
+    ('text + category', {'q': 'winter boots', 'category': 0}),
+    ('text + filters', {'q': 'cotton shirt', 'min_price': 20, 'max_price': 80, 'size': ['M', 'L'], 'color': 'blue'}),
+    ('filters newest', {'category': 1, 'on_sale': 'true', 'size': '42', 'sort': 'newest'}),
+    ('price newest', {'min_price': 100, 'max_price': 120, 'sort': 'newest'}),
+]
+
+
+async def seed() -> list:
+    async with SessionLocal() as db:
+        existing = {name for name in await db.scalars(select(Category.name).filter(Category.name.like('Bench category %')))}
+        db.add_all(Category(name=f'Bench category {i}') for i in range(CATEGORIES) if f'Bench category {i}' not in existing)
+        await db.commit()
+        categories = list(await db.scalars(select(Category.id).filter(Category.name.like('Bench category %')).order_by(Category.name)))
+
+        count = await db.scalar(text("SELECT count(*) FROM products WHERE sku LIKE 'BENCH-%'"))
+        if count >= PRODUCTS:
+            return categories
+        started = time.perf_counter()
+        for start in range(count, PRODUCTS, BATCH):
+            await db.execute(SEED_BATCH, {
+                'start': start, 'stop': min(start + BATCH, PRODUCTS), 'words': WORDS, 'categories': categories,
+                'variations': VARIATIONS, 'sizes': SIZES, 'colors': COLORS,
+            })
+            await db.commit()
+            print(f'seeded {min(start + BATCH, PRODUCTS)} products, {time.perf_counter() - started:.0f}s')
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text('ANALYZE products, product_categories, product_variations'))
+    return categories
+
+
+async def run(client: httpx.AsyncClient, params: dict) -> tuple[list[float], list[float], int, int]:
+    first, following = [], []
+    total = items = 0
+
+    async def one():
+        nonlocal total, items
+        start = time.perf_counter()
+        resp = await client.get('/api/products/search/', params={**params, 'limit': PAGE_SIZE})
+        resp.raise_for_status()
+        first.append(time.perf_counter() - start)
+        body = resp.json()
+        total, items = body['total'], len(body['items'])
+        cursor = resp.headers.get('x-next-cursor')
+        if cursor:
+            start = time.perf_counter()
+            resp = await client.get('/api/products/search/', params={**params, 'limit': PAGE_SIZE, 'cursor': cursor})
+            resp.raise_for_status()
+            following.append(time.perf_counter() - start)
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited():
+        async with semaphore:
+            await one()
+
+    await asyncio.gather(*[limited() for _ in range(REQUESTS)])
+    return first, following, total, items
+
+
+def percentiles(latencies: list[float]) -> str:
+    if not latencies:
+        return f'{"-":>8} {"-":>8}'
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    return f'{p50:>8.1f} {p99:>8.1f}'
+
+
+async def main():
+    categories = await seed()
+    app = FastAPI()
+    app.include_router(router, prefix='/api')
+    print(f'{PRODUCTS} products, {REQUESTS} searches per query, concurrency {CONCURRENCY}, page {PAGE_SIZE}')
+    print(f'{"":>16} {"matches":>8} {"first p50":>9} {"p99":>8} {"next p50":>9} {"p99":>8}')
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench', timeout=60) as client:
+        for name, params in QUERIES:
+            params = dict(params)
+            if 'category' in params:
+                params['category_id'] = str(categories[params.pop('category')])
+            # Warm up the pool and the cache
+            await client.get('/api/products/search/', params={**params, 'limit': PAGE_SIZE})
+            first, following, total, _ = await run(client, params)
+            print(f'{name:>16} {total:>8} {percentiles(first):>18} {percentiles(following):>18}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
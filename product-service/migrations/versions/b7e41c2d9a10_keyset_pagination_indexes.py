@@ -0,0 +1,52 @@
+"""Keyset pagination indexes
+
+Revision ID: b7e41c2d9a10
+Revises: 1364ad3b6376
+Create Date: 2026-10-18 09:12:04.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e41c2d9a10'
+down_revision: Union[str, Sequence[str], None] = '1364ad3b6376'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# List endpoints page on (created_at, id); each index leads with the filter it serves
+INDEXES = [
+    ('ix_products_created_at_id', 'products', ['created_at', 'id']),
+    ('ix_categories_created_at_id', 'categories', ['created_at', 'id']),
+    ('ix_comments_variation_created_at_id', 'comments', ['product_variation_id', 'created_at', 'comment_id']),
+    ('ix_product_images_variation_created_at_id', 'product_images', ['product_variation_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+    # NULL would sort apart from every cursor, so the sort key must always be set
+    for table in ('products', 'comments', 'product_images'):
+        op.execute(f'UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), existing_server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
+
+    # Built without locking writes out of tables that may already be large
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    for table in ('product_images', 'comments', 'products'):
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), existing_server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True)
+    op.drop_column('categories', 'created_at')
@@ -0,0 +1,31 @@
+"""Product variations product_id index
+
+Revision ID: d2a9c41f7e58
+Revises: b7e41c2d9a10
+Create Date: 2026-10-18 11:26:47.104392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a9c41f7e58'
+down_revision: Union[str, Sequence[str], None] = 'b7e41c2d9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Variations are listed per product; Postgres does not index foreign keys by itself
+    with op.get_context().autocommit_block():
+        op.create_index('ix_product_variations_product_id', 'product_variations', ['product_id'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_product_variations_product_id', table_name='product_variations', postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""Product search
+
+Revision ID: e5b7f20c6a93
+Revises: d2a9c41f7e58
+Create Date: 2026-10-18 14:02:31.886520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7f20c6a93'
+down_revision: Union[str, Sequence[str], None] = 'd2a9c41f7e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same expression as Product.search_vector
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(about, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column rewrites products under an exclusive lock, schedule it
+    # for a quiet moment on a large catalogue
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_search_vector', 'products', ['search_vector'], postgresql_using='gin', postgresql_concurrently=True)
+        # The primary key leads with product_id, so it does not help filtering by category
+        op.create_index('ix_product_categories_category_id', 'product_categories', ['category_id'], postgresql_concurrently=True)
+        # Size and colour facets count distinct products per value, read in order from these
+        op.create_index('ix_product_variations_size_product_id', 'product_variations', ['size', 'product_id'], postgresql_concurrently=True)
+        op.create_index('ix_product_variations_color_product_id', 'product_variations', ['color', 'product_id'], postgresql_concurrently=True)
+        op.create_index('ix_product_variations_price', 'product_variations', ['price'], postgresql_include=['product_id'], postgresql_concurrently=True)
+        # Replaces the product_id index; facets of matching products read size and colour from it alone
+        op.create_index('ix_product_variations_product_id_facets', 'product_variations', ['product_id'], postgresql_include=['size', 'color'], postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_product_id', table_name='product_variations', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_product_variations_product_id', 'product_variations', ['product_id'], postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_product_id_facets', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_price', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_color_product_id', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_size_product_id', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_product_categories_category_id', table_name='product_categories', postgresql_concurrently=True)
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True)
+
+    op.drop_column('products', 'search_vector')
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Literal, Optional
 from uuid import UUID
 import httpx
 import os
@@ -8,6 +8,7 @@ from src.app.core.db import get_db
 from src.app.core.db import SessionLocal
 from src.app.core.config import SHOP_SERVICE_URL
 from src.app.core.shop_client import shop_client
+from src.app.core.pagination import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, NEXT_CURSOR_HEADER
 # Repositories
 from src.app.repositories.v1.category import CategoryRepository
 from src.app.repositories.v1.product import ProductRepository
@@ -16,55 +17,72 @@ from src.app.repositories.v1.product_image import ProductImageRepository
 from src.app.repositories.v1.comment import CommentRepository
 # Schemas
 from src.app.schemas.v1.category import CategoryCreate, Category
-from src.app.schemas.v1.product import ProductCreate, Product
-from src.app.schemas.v1.product_variation import ProductVariationCreate, ProductVariation
+from src.app.schemas.v1.product import ProductCreate, Product, ProductFull, ProductSearchFilters, ProductSearchResult
+from src.app.schemas.v1.product_variation import ProductVariationCreate, ProductVariation, ProductVariationWithRating
 from src.app.schemas.v1.product_image import ProductImageCreate, ProductImage
 from src.app.schemas.v1.comment import CommentCreate, Comment
 
 router = APIRouter()
 
+
+def _page_cursor(cursor: Optional[str], decode=decode_cursor):
+    if cursor is None:
+        return None
+    try:
+        return decode(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page_response(response: Response, page, encode=encode_cursor):
+    items, next_position = page
+    if next_position is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode(next_position)
+    return items
+
+
 # Endpoints for Category
 @router.post("/categories/", response_model=Category)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_db)):
     repo = CategoryRepository(db)
-    return repo.create(category)
+    return await repo.create(category)
 
 
 @router.get("/categories/", response_model=List[Category])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_categories(response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     repo = CategoryRepository(db)
-    return repo.get_all(skip, limit)
+    return _page_response(response, await repo.get_page(cursor=_page_cursor(cursor), skip=skip, limit=limit))
 
 
 @router.get("/categories/{category_id}", response_model=Category)
-def read_category(category_id: UUID, db: Session = Depends(get_db)):
+async def read_category(category_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = CategoryRepository(db)
-    category = repo.get(category_id)
+    category = await repo.get(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
 
 @router.put("/categories/{category_id}", response_model=Category)
-def update_category(category_id: UUID, category: CategoryCreate, db: Session = Depends(get_db)):
+async def update_category(category_id: UUID, category: CategoryCreate, db: AsyncSession = Depends(get_db)):
     repo = CategoryRepository(db)
-    updated_category = repo.update(category_id, category)
+    updated_category = await repo.update(category_id, category)
     if not updated_category:
         raise HTTPException(status_code=404, detail="Category not found")
     return updated_category
 
 
 @router.delete("/categories/{category_id}")
-def delete_category(category_id: UUID, db: Session = Depends(get_db)):
+async def delete_category(category_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = CategoryRepository(db)
-    if not repo.delete(category_id):
+    if not await repo.delete(category_id):
         raise HTTPException(status_code=404, detail="Category not found")
     return {"message": "Category deleted"}
 
 # Endpoints for Product
 # Endpoints for Product
 @router.post("/products/", response_model=Product)
-async def create_product(product: ProductCreate, request: Request, db: Session = Depends(get_db)):
+async def create_product(product: ProductCreate, request: Request, db: AsyncSession = Depends(get_db)):
     user_id = request.headers.get('x-user-id')
     if not user_id:
         raise HTTPException(
@@ -79,7 +97,7 @@ async def create_product(product: ProductCreate, request: Request, db: Session =
         )
     repo = ProductRepository(db)
     try:
-        result = repo.create_with_categories(product, shop_id)
+        result = await repo.create_with_categories(product, shop_id)
         return result
     except ValueError as e:
         raise HTTPException(
@@ -89,36 +107,76 @@ async def create_product(product: ProductCreate, request: Request, db: Session =
 
 
 @router.get("/products/", response_model=List[Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_products(response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    repo = ProductRepository(db)
+    return _page_response(response, await repo.get_page(cursor=_page_cursor(cursor), skip=skip, limit=limit))
+
+
+@router.get("/products/search/", response_model=ProductSearchResult)
+async def search_products(
+    response: Response,
+    q: Annotated[Optional[str], Query(max_length=200)] = None,
+    category_id: Annotated[List[UUID], Query()] = [],
+    min_price: Annotated[Optional[float], Query(ge=0)] = None,
+    max_price: Annotated[Optional[float], Query(ge=0)] = None,
+    on_sale: Optional[bool] = None,
+    top_sale: Optional[bool] = None,
+    size: Annotated[List[str], Query()] = [],
+    color: Annotated[List[str], Query()] = [],
+    sort: Literal["relevance", "newest"] = "relevance",
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    facets: bool = True,
+    db: AsyncSession = Depends(get_db),
+):
+    filters = ProductSearchFilters(
+        q=q, category_id=category_id, min_price=min_price, max_price=max_price,
+        on_sale=on_sale, top_sale=top_sale, size=size, color=color, sort=sort,
+    )
     repo = ProductRepository(db)
-    return repo.get_all(skip, limit)
+    decode, encode = (decode_rank_cursor, encode_rank_cursor) if filters.by_relevance else (decode_cursor, encode_cursor)
+    page = await repo.search(filters, cursor=_page_cursor(cursor, decode), limit=limit)
+    result = {"items": _page_response(response, page, encode)}
+    if facets and cursor is None:
+        result["total"], result["facets"] = await repo.search_facets(filters)
+    return result
 
 
 @router.get("/products/{product_id}", response_model=Product)
-def read_product(product_id: UUID, db: Session = Depends(get_db)):
+async def read_product(product_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = ProductRepository(db)
-    product = repo.get(product_id)
+    product = await repo.get(product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
+@router.get("/products/{product_id}/full", response_model=ProductFull)
+async def read_product_full(product_id: UUID, db: AsyncSession = Depends(get_db)):
+    # Everything a product page shows, in place of one call per variation for its images and comments
+    repo = ProductRepository(db)
+    product = await repo.get_full(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 
 @router.put("/products/{product_id}", response_model=Product)
-def update_product(product_id: UUID, product: ProductCreate, request: Request, db: Session = Depends(get_db)):
+async def update_product(product_id: UUID, product: ProductCreate, request: Request, db: AsyncSession = Depends(get_db)):
     repo = ProductRepository(db)
-    updated_product = repo.update(product_id, product)
+    updated_product = await repo.update(product_id, product)
     if not updated_product:
         raise HTTPException(status_code=404, detail="Product not found")
     return updated_product
         
 @router.patch("/products/{product_id}", response_model=Product)
-async def partial_update_product(product_id: UUID, product_data: dict, request: Request, db: Session = Depends(get_db)):
+async def partial_update_product(product_id: UUID, product_data: dict, request: Request, db: AsyncSession = Depends(get_db)):
     user_id = request.headers.get('x-user-id')
     if not user_id:
         raise HTTPException(status_code=401, detail="User ID required")
     
     repo = ProductRepository(db)
-    existing_product = repo.get(product_id)
+    existing_product = await repo.get(product_id)
     if not existing_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -126,76 +184,82 @@ async def partial_update_product(product_id: UUID, product_data: dict, request:
     if not shop_id or str(existing_product.shop_id) != str(shop_id):
         raise HTTPException(status_code=403, detail="You can only update your own products")
     
-    updated_product = repo.update(product_id, product_data)
+    updated_product = await repo.update(product_id, product_data)
     return updated_product
 
 
 @router.delete("/products/{product_id}")
-def delete_product(product_id: UUID, db: Session = Depends(get_db)):
+async def delete_product(product_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = ProductRepository(db)
-    if not repo.delete(product_id):
+    if not await repo.delete(product_id):
         raise HTTPException(status_code=404, detail="Product not found")
     return {"message": "Product deleted"}
 
 
 # Endpoints for ProductVariation
 @router.post("/products/{product_id}/variations/", response_model=ProductVariation)
-def create_product_variation(product_id: UUID, variation: ProductVariationCreate, db: Session = Depends(get_db)): # Can be eliminated(product_id)
+async def create_product_variation(product_id: UUID, variation: ProductVariationCreate, db: AsyncSession = Depends(get_db)): # Can be eliminated(product_id)
     repo = ProductVariationRepository(db)
-    return repo.create(variation)
+    return await repo.create(variation)
 
 
 @router.get("/products/{product_id}/variations/", response_model=List[ProductVariation])
-def read_product_variations(product_id: UUID, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_product_variations(product_id: UUID, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    repo = ProductVariationRepository(db)
+    return await repo.get_by_product(product_id, skip, limit)
+
+
+@router.get("/products/{product_id}/variations/ratings/", response_model=List[ProductVariationWithRating])
+async def read_product_variations_with_rating(product_id: UUID, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    # Variations with their images and average rating, instead of a follow-up call per variation
     repo = ProductVariationRepository(db)
-    variations = repo.get_all(skip, limit)
-    return [v for v in variations if v.product_id == product_id]  # Filter by product_id
+    return await repo.get_by_product(product_id, skip, limit, with_rating=True)
 
 
 @router.get("/products/variations/{variation_id}", response_model=ProductVariation)
-def read_product_variation(variation_id: UUID, db: Session = Depends(get_db)):
+async def read_product_variation(variation_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = ProductVariationRepository(db)
-    variation = repo.get(variation_id)
+    variation = await repo.get(variation_id)
     if not variation:
         raise HTTPException(status_code=404, detail="Variation not found")
     return variation
 
 @router.put("/products/variations/{variation_id}", response_model=ProductVariation)
-def update_product_variation(variation_id: UUID, variation: ProductVariationCreate, db: Session = Depends(get_db)):
+async def update_product_variation(variation_id: UUID, variation: ProductVariationCreate, db: AsyncSession = Depends(get_db)):
     repo = ProductVariationRepository(db)
-    updated_variation = repo.update(variation_id, variation)
+    updated_variation = await repo.update(variation_id, variation)
     if not updated_variation:
         raise HTTPException(status_code=404, detail="Variation not found")
     return updated_variation
 
 
 @router.delete("/products/variations/{variation_id}")
-def delete_product_variation(variation_id: UUID, db: Session = Depends(get_db)):
+async def delete_product_variation(variation_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = ProductVariationRepository(db)
-    if not repo.delete(variation_id) or not repo.get(variation_id):
+    if not await repo.delete(variation_id) or not await repo.get(variation_id):
         raise HTTPException(status_code=404, detail="Variation not found")
     return {"message": "Variation deleted"}
 
 
 # Endpoints for ProductImage
 @router.post("/products/variations/{variation_id}/images/")
-def create_product_image(variation_id: UUID, image: ProductImageCreate, db: Session = Depends(get_db)):
+async def create_product_image(variation_id: UUID, image: ProductImageCreate, db: AsyncSession = Depends(get_db)):
     repo = ProductImageRepository(db)
     image_data = image.dict()
     image_data["product_variation_id"] = variation_id
-    return repo.create(image_data)
+    return await repo.create(image_data)
 
 
 @router.get("/products/variations/{variation_id}/images/", response_model=List[ProductImage])
-def read_product_images(variation_id: UUID, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_product_images(variation_id: UUID, response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     repo = ProductImageRepository(db)
-    return repo.get_by_variation(variation_id, skip, limit)
+    return _page_response(response, await repo.get_by_variation(variation_id, _page_cursor(cursor), skip, limit))
 
 
 @router.delete("/products/variations/{variation_id}/images/{image_id}") # Can remove variation_id from the path if not needed
-def delete_product_image(variation_id: UUID, image_id: UUID, db: Session = Depends(get_db)):
+async def delete_product_image(variation_id: UUID, image_id: UUID, db: AsyncSession = Depends(get_db)):
     repo = ProductImageRepository(db)
-    if not repo.delete(image_id):
+    if not await repo.delete(image_id):
         raise HTTPException(status_code=404, detail="Image not found")
     return {"message": "Image deleted"}
 
@@ -206,7 +270,7 @@ async def create_comment(
     variation_id: UUID,
     comment: CommentCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_id = request.headers.get("x-user-id")
     if not user_id:
@@ -221,10 +285,10 @@ async def create_comment(
     comment_data["user_id"] = user_id
 
     repo = CommentRepository(db)
-    return repo.create(comment_data)
+    return await repo.create(comment_data)
 
 
 @router.get("/products/variations/{variation_id}/comments/", response_model=List[Comment])
-def read_comments(variation_id: UUID, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_comments(variation_id: UUID, response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     repo = CommentRepository(db)
-    return repo.get_by_variation(variation_id, skip, limit)
\ No newline at end of file
+    return _page_response(response, await repo.get_by_variation(variation_id, _page_cursor(cursor), skip, limit))
\ No newline at end of file
@@ -1,19 +1,40 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
+from src.app.core.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+)
+from src.app.core.tracing import trace_engine
 
-load_dotenv()  # Load environment variables from .env
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-print("Database URL:", DATABASE_URL)  # Debugging line to check if the URL is loaded correctly
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url() -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    # postgresql:// and postgresql+psycopg2:// both become postgresql+asyncpg://
+    url = make_url(DATABASE_URL)
+    return url.set(drivername=f'{url.get_backend_name()}+asyncpg').render_as_string(hide_password=False)
+
+
+engine = create_async_engine(
+    async_database_url(),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+# Cursor events fire on the sync engine the async one wraps
+trace_engine(engine.sync_engine)
+# Objects stay readable after commit; reloading expired attributes would need an await
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+
+# List endpoints page newest first on (created_at, id). The cursor is the position
+# of the last row sent, opaque to clients; a page of results comes with the cursor
+# for the next one in this header, which is left out on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    return json.loads(raw)
+
+
+def encode_cursor(position: tuple[datetime, UUID]) -> str:
+    created_at, id = position
+    return _encode([created_at.isoformat(), str(id)])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, id = _decode(cursor)
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+# Search results ordered by relevance page on (rank, id) instead
+def encode_rank_cursor(position: tuple[float, UUID]) -> str:
+    rank, id = position
+    return _encode([rank, str(id)])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        rank, id = _decode(cursor)
+        return float(rank), UUID(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
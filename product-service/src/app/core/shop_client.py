@@ -3,6 +3,7 @@ import os
 from typing import Optional
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
+from src.app.core.tracing import TracingTransport
 
 
 load_dotenv()
@@ -19,7 +20,7 @@ class ShopServiceClient:
         try:
             url = f'{self.base_url}/api/user/{user_id}/'
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=TracingTransport()) as client:
                 response = await client.get(
                     url,
                     headers={'Content-Type': 'application/json'}
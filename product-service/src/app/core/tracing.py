@@ -0,0 +1,60 @@
+import os
+
+import httpx
+from fastapi import Request
+from sqlalchemy import event
+
+from . import trace_context
+from .trace_context import TRACE_EXPORT_FILE, TRACE_STATEMENT_MAX_LENGTH, current_span, span, start_span
+
+# Continues the gateway's trace through requests, shop-service calls and queries.
+# Spans are appended to TRACE_EXPORT_FILE as JSON lines, in the gateway's format.
+trace_context.SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'product-service')
+
+
+async def tracing_middleware(request: Request, call_next):
+    traceparent = request.headers.get('traceparent')
+    with span(request.method, 'server', traceparent, method=request.method, path=request.url.path) as current:
+        response = await call_next(request)
+        route = request.scope.get('route')
+        if route is not None:
+            current.name = f'{request.method} {route.path}'
+        current.attributes['status_code'] = response.status_code
+    return response
+
+
+class TracingTransport(httpx.AsyncHTTPTransport):
+    # Records a client span for each call and hands its traceparent to the callee
+    async def handle_async_request(self, request):
+        with span(f'{request.method} {request.url.host}', 'client', method=request.method, url=str(request.url)) as current:
+            request.headers['traceparent'] = current.traceparent
+            response = await super().handle_async_request(request)
+            current.attributes['status_code'] = response.status_code
+            return response
+
+
+def trace_engine(engine):
+    # The async engine runs these hooks in a greenlet that shares the awaiting task's
+    # context, so query spans are children of the request's span.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        current = current_span.get()
+        if TRACE_EXPORT_FILE and current is not None and current.sampled:
+            context._trace_span = start_span(
+                'db.query', 'client', statement=statement[:TRACE_STATEMENT_MAX_LENGTH], many=executemany
+            )
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        query_span = getattr(context, '_trace_span', None)
+        if query_span is not None:
+            context._trace_span = None
+            query_span.end()
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        query_span = getattr(exception_context.execution_context, '_trace_span', None)
+        if query_span is not None:
+            exception_context.execution_context._trace_span = None
+            query_span.attributes['error'] = f'{type(exception_context.original_exception).__name__}: {exception_context.original_exception}'
+            query_span.end()
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request
 from src.app.api.v1.routes import router
+from src.app.core.tracing import tracing_middleware
 
 app = FastAPI(
     title="Product Service",
@@ -8,6 +9,7 @@ app = FastAPI(
     debug=True,
 )
 
+app.middleware("http")(tracing_middleware)
 app.include_router(router, prefix="/api")
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,9 +7,11 @@ from src.app.core.db import Base
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_created_at_id", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False, unique=True)
     is_parent = Column(Boolean, default=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
 
     products = relationship("Product", secondary="product_categories")
\ No newline at end of file
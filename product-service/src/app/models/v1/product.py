@@ -1,11 +1,23 @@
 import uuid
-from sqlalchemy import UUID, Column, BigInteger, String, Text, Boolean, Numeric, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import UUID, Column, BigInteger, String, Text, Boolean, Numeric, DateTime, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, query_expression, deferred
 from sqlalchemy.sql import func
 from src.app.core.db import Base
 
+# Title and description are stemmed, SKUs are kept as written so codes match verbatim
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(about, '')), 'B')"
+)
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     shop_id = Column(UUID, nullable=True) 
@@ -15,9 +27,15 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     top_sale = Column(Boolean, default=False)
     top_popular = Column(Boolean, default=False)
-    created_at = Column(DateTime, server_default=func.current_timestamp())
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
     sku = Column(String(50), unique=True)
     base_price = Column(Numeric(10, 2), nullable=False)
+    # Kept up to date by Postgres; deferred so it is not sent back with every product
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
 
     categories = relationship("Category", secondary="product_categories")
-    variations = relationship("ProductVariation", back_populates="product")
\ No newline at end of file
+    variations = relationship("ProductVariation", back_populates="product")
+
+    # Only filled in by queries that ask for them, see ProductRepository.get_full
+    rating_average = query_expression()
+    rating_count = query_expression()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,11 +7,12 @@ from src.app.core.db import Base
 
 class ProductImage(Base):
     __tablename__ = "product_images"
+    __table_args__ = (Index("ix_product_images_variation_created_at_id", "product_variation_id", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     product_variation_id = Column(UUID(as_uuid=True), ForeignKey("product_variations.id", ondelete="CASCADE"), nullable=False)
     image_url = Column(String(255), nullable=False)
     alt_text = Column(String(100), nullable=True)
-    created_at = Column(DateTime, server_default=func.current_timestamp())
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
 
     variation = relationship("ProductVariation", back_populates="images")
\ No newline at end of file
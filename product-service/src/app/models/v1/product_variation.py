@@ -1,12 +1,18 @@
-from sqlalchemy import BigInteger, Column, String, Numeric, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, String, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 import uuid
 from src.app.core.db import Base
 
 class ProductVariation(Base):
     __tablename__ = "product_variations"
+    __table_args__ = (
+        Index("ix_product_variations_product_id_facets", "product_id", postgresql_include=["size", "color"]),
+        Index("ix_product_variations_size_product_id", "size", "product_id"),
+        Index("ix_product_variations_color_product_id", "color", "product_id"),
+        Index("ix_product_variations_price", "price", postgresql_include=["product_id"]),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
@@ -21,4 +27,8 @@ class ProductVariation(Base):
 
     product = relationship("Product", back_populates="variations")
     images = relationship("ProductImage", back_populates="variation")
-    comments = relationship("Comment", back_populates="variation")
\ No newline at end of file
+    comments = relationship("Comment", back_populates="variation")
+
+    # Only filled in by queries that ask for them, see ProductVariationRepository.get_by_product
+    rating_average = query_expression()
+    rating_count = query_expression()
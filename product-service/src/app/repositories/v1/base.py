@@ -1,16 +1,26 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import TypeVar, Generic, List, Optional
 from uuid import UUID
-from sqlalchemy import update, delete
+from sqlalchemy import select, inspect, tuple_
 
 T = TypeVar('T')
 
 class BaseRepository(Generic[T]):
-    def __init__(self, model: T, db_session: Session):
+    # Relationships the response schema reads; lazy loading is not possible on an AsyncSession
+    load_options: tuple = ()
+
+    def __init__(self, model: T, db_session: AsyncSession):
         self.model = model
         self.db_session = db_session
 
-    def create(self, obj_in) -> T:
+    async def _reload(self, db_obj: T) -> T:
+        # Picks up server defaults and the relationships in load_options after a write,
+        # by loading it afresh; get() would otherwise hand back the instance as it is
+        identity = inspect(db_obj).identity
+        self.db_session.expunge(db_obj)
+        return await self.db_session.get(self.model, identity, options=self.load_options)
+
+    async def create(self, obj_in) -> T:
         # Handle both Pydantic models and plain dictionaries
         if hasattr(obj_in, 'dict'):
             data = obj_in.dict()
@@ -18,18 +28,42 @@ class BaseRepository(Generic[T]):
             data = obj_in
         db_obj = self.model(**data)
         self.db_session.add(db_obj)
-        self.db_session.commit()
-        self.db_session.refresh(db_obj)
-        return db_obj
+        await self.db_session.commit()
+        return await self._reload(db_obj)
+
+    async def get(self, id: UUID) -> Optional[T]:
+        result = await self.db_session.execute(
+            select(self.model).options(*self.load_options).filter(self.model.id == id)
+        )
+        return result.scalars().first()
 
-    def get(self, id: UUID) -> Optional[T]:
-        return self.db_session.query(self.model).filter(self.model.id == id).first()
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
+        result = await self.db_session.execute(
+            select(self.model).options(*self.load_options).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
-        return self.db_session.query(self.model).offset(skip).limit(limit).all()
+    async def get_page(self, *criteria, cursor: Optional[tuple] = None, skip: int = 0, limit: int = 100) -> tuple[List[T], Optional[tuple]]:
+        # Newest first on (created_at, primary key). Rows after `cursor` are found through
+        # the matching index, so a page costs the same however deep it is; `skip` is only
+        # honoured without a cursor, for clients that still page by offset.
+        created_at = self.model.created_at
+        pk = inspect(self.model).primary_key[0]
+        query = select(self.model).options(*self.load_options).filter(*criteria)
+        if cursor is not None:
+            query = query.filter(tuple_(created_at, pk) < tuple_(*cursor))
+        elif skip:
+            query = query.offset(skip)
+        # One extra row tells whether there is a next page
+        result = await self.db_session.scalars(query.order_by(created_at.desc(), pk.desc()).limit(limit + 1))
+        items = list(result.all())
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, (items[-1].created_at, getattr(items[-1], pk.key))
 
-    def update(self, id: UUID, obj_in) -> Optional[T]:
-        db_obj = self.get(id)
+    async def update(self, id: UUID, obj_in) -> Optional[T]:
+        db_obj = await self.get(id)
         if not db_obj:
             return None
         # Handle both Pydantic models and plain dictionaries
@@ -39,14 +73,13 @@ class BaseRepository(Generic[T]):
             data = obj_in
         for key, value in data.items():
             setattr(db_obj, key, value)
-        self.db_session.commit()
-        self.db_session.refresh(db_obj)
-        return db_obj
+        await self.db_session.commit()
+        return await self._reload(db_obj)
 
-    def delete(self, id: UUID) -> bool:
-        db_obj = self.get(id)
+    async def delete(self, id: UUID) -> bool:
+        db_obj = await self.get(id)
         if not db_obj:
             return False
-        self.db_session.delete(db_obj)
-        self.db_session.commit()
-        return True
\ No newline at end of file
+        await self.db_session.delete(db_obj)
+        await self.db_session.commit()
+        return True
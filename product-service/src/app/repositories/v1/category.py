@@ -1,7 +1,10 @@
 from .base import BaseRepository
 from src.app.models.v1 import Category    
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 class CategoryRepository(BaseRepository[Category]):
-    def __init__(self, db: Session):
-        super().__init__(Category, db)
\ No newline at end of file
+    load_options = (selectinload(Category.products),)
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(Category, db)
@@ -2,34 +2,39 @@ from .base import BaseRepository
 from src.app.models.v1 import Comment, ProductVariation
 from fastapi import HTTPException
 from uuid import UUID
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
 class CommentRepository(BaseRepository[Comment]):
-    def __init__(self, db_session: Session):
+    # The schema's nested variation lists this row again, so it can only ever be sent empty
+    load_options = (noload(Comment.variation),)
+
+    def __init__(self, db_session: AsyncSession):
         super().__init__(Comment, db_session)
 
-    def create(self, obj_in: dict) -> Comment:
+    async def create(self, obj_in: dict) -> Comment:
         product_variation_id = obj_in.get("product_variation_id")
         if not product_variation_id:
             raise HTTPException(status_code=400, detail="product_variation_id is required")
-        if not self.db_session.query(ProductVariation).filter(ProductVariation.id == product_variation_id).first():
+        if not await self.db_session.scalar(select(ProductVariation.id).filter(ProductVariation.id == product_variation_id)):
             raise HTTPException(status_code=404, detail="ProductVariation not found")
         rating = obj_in.get("rating")
         if rating is not None and not (1 <= rating <= 5):
             raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
         db_obj = Comment(**obj_in)
         self.db_session.add(db_obj)
-        self.db_session.commit()
-        self.db_session.refresh(db_obj)
-        return db_obj
+        await self.db_session.commit()
+        return await self._reload(db_obj)
 
-    def get_by_variation(self, variation_id: UUID, skip: int = 0, limit: int = 100) -> list[Comment]:
-        return self.db_session.query(Comment).filter(Comment.product_variation_id == variation_id).offset(skip).limit(limit).all()
+    async def get_by_variation(self, variation_id: UUID, cursor: Optional[tuple] = None, skip: int = 0, limit: int = 100) -> tuple[list[Comment], Optional[tuple]]:
+        return await self.get_page(Comment.product_variation_id == variation_id, cursor=cursor, skip=skip, limit=limit)
 
-    def delete(self, id: UUID) -> bool:
-        db_obj = self.get(id)
+    async def delete(self, id: UUID) -> bool:
+        db_obj = await self.get(id)
         if db_obj:
-            self.db_session.delete(db_obj)
-            self.db_session.commit()
+            await self.db_session.delete(db_obj)
+            await self.db_session.commit()
             return True
         return False
\ No newline at end of file
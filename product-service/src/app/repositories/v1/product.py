@@ -1,111 +1,248 @@
 # src/app/repositories/v1/product.py
-from sqlalchemy import delete, and_
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from decimal import Decimal
+from sqlalchemy import select, delete, func, and_, or_, tuple_, cast, null, literal, literal_column, union_all, distinct, Float, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, with_expression
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from .base import BaseRepository
-from src.app.models.v1 import Product, ProductCategory, Category
-from src.app.schemas.v1 import ProductCreate, ProductBase
+from .product_variation import ProductVariationRepository
+from src.app.models.v1 import Product, ProductCategory, Category, ProductVariation, Comment
+from src.app.schemas.v1 import ProductCreate, ProductBase, ProductSearchFilters
 
 
 class ProductRepository(BaseRepository[Product]):
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: AsyncSession):
         super().__init__(Product, db_session)
 
-    def create_with_categories(self, obj_in: ProductCreate, shop_id: UUID) -> Product:
-        category_ids = obj_in.category_ids or []
-        
+    async def _check_categories(self, category_ids: List[UUID]):
         # Verify that all categories exist before proceeding
         if category_ids:
-            existing_categories = self.db_session.query(Category).filter(
-                Category.id.in_(category_ids)
-            ).all()
-            existing_category_ids = {str(cat.id) for cat in existing_categories}
-            missing_categories = set(str(cid) for cid in category_ids) - existing_category_ids
+            existing_category_ids = await self.db_session.scalars(
+                select(Category.id).filter(Category.id.in_(category_ids))
+            )
+            missing_categories = set(str(cid) for cid in category_ids) - {str(cid) for cid in existing_category_ids}
             
             if missing_categories:
                 raise ValueError(f"Categories with IDs {missing_categories} do not exist")
+
+    async def create_with_categories(self, obj_in: ProductCreate, shop_id: UUID) -> Product:
+        category_ids = obj_in.category_ids or []
+        await self._check_categories(category_ids)
         
         # Remove category_ids from dict and add shop_id
         clean_data = obj_in.dict(exclude={"category_ids"})
         clean_data["shop_id"] = shop_id
         
-        # Create product with all needed data
-        db_product = super().create(clean_data)
-        
+        # Product and its categories go in with one commit
+        db_product = Product(**clean_data)
+        self.db_session.add(db_product)
+        await self.db_session.flush()
         for category_id in category_ids:
             pc = ProductCategory(product_id=db_product.id, category_id=category_id)
             self.db_session.add(pc)
-        self.db_session.commit()
-        return db_product
+        await self.db_session.commit()
+        return await self._reload(db_product)
 
-    def update_with_categories(self, id: UUID, obj_in: ProductCreate) -> Optional[Product]:
+    async def update_with_categories(self, id: UUID, obj_in: ProductCreate) -> Optional[Product]:
         category_ids = obj_in.category_ids or []
         
         # Get existing product to maintain shop_id
-        existing_product = super().get(id)
+        existing_product = await super().get(id)
         if not existing_product:
             return None
-            
-        # Verify that all categories exist before proceeding
-        if category_ids:
-            existing_categories = self.db_session.query(Category).filter(
-                Category.id.in_(category_ids)
-            ).all()
-            existing_category_ids = {str(cat.id) for cat in existing_categories}
-            missing_categories = set(str(cid) for cid in category_ids) - existing_category_ids
-            
-            if missing_categories:
-                raise ValueError(f"Categories with IDs {missing_categories} do not exist")
+        await self._check_categories(category_ids)
         
         # Get only SET fields from ProductCreate and maintain shop_id
         clean_data = obj_in.dict(exclude={"category_ids"}, exclude_unset=True)
         clean_data["shop_id"] = existing_product.shop_id
         
         # Update product data
-        db_product = super().update(id, clean_data)
+        db_product = await super().update(id, clean_data)
         
         if not db_product:
             return None
         
         # Replace categories
-        self.db_session.execute(delete(ProductCategory).where(ProductCategory.product_id == id))
+        await self.db_session.execute(delete(ProductCategory).where(ProductCategory.product_id == id))
         for category_id in category_ids:
             pc = ProductCategory(product_id=id, category_id=category_id)
             self.db_session.add(pc)
-        self.db_session.commit()
+        await self.db_session.commit()
         return db_product
 
-    def get_categories_for_product(self, product_id: UUID) -> List[Category]:
-        return self.db_session.query(Category).join(
-            ProductCategory,
-            ProductCategory.category_id == Category.id
-        ).filter(ProductCategory.product_id == product_id).all()
+    async def get_full(self, product_id: UUID) -> Optional[Product]:
+        # Four statements however many variations, images and comments there are: the
+        # product with its rating, then one SELECT ... IN each for categories,
+        # variations with their ratings, and images
+        def comments(column):
+            return (
+                select(column)
+                .join(ProductVariation, ProductVariation.id == Comment.product_variation_id)
+                .filter(ProductVariation.product_id == Product.id)
+                .scalar_subquery()
+            )
+
+        result = await self.db_session.scalars(
+            select(Product).options(
+                with_expression(Product.rating_average, comments(func.avg(Comment.rating))),
+                with_expression(Product.rating_count, comments(func.count(Comment.comment_id))),
+                selectinload(Product.categories),
+                selectinload(Product.variations).options(
+                    *ProductVariationRepository.rating_options,
+                    *ProductVariationRepository.rating_expressions(),
+                ),
+            ).filter(Product.id == product_id)
+        )
+        return result.first()
 
-    def add_category(self, product_id: UUID, category_id: UUID) -> bool:
-        existing = self.db_session.query(ProductCategory).filter(
-            and_(ProductCategory.product_id == product_id, ProductCategory.category_id == category_id)
-        ).first()
+    async def get_categories_for_product(self, product_id: UUID) -> List[Category]:
+        result = await self.db_session.scalars(
+            select(Category).join(
+                ProductCategory,
+                ProductCategory.category_id == Category.id
+            ).filter(ProductCategory.product_id == product_id)
+        )
+        return list(result.all())
+
+    async def _get_product_category(self, product_id: UUID, category_id: UUID) -> Optional[ProductCategory]:
+        return await self.db_session.get(ProductCategory, (product_id, category_id))
+
+    async def add_category(self, product_id: UUID, category_id: UUID) -> bool:
+        existing = await self._get_product_category(product_id, category_id)
         if existing:
             return False
         pc = ProductCategory(product_id=product_id, category_id=category_id)
         self.db_session.add(pc)
-        self.db_session.commit()
+        await self.db_session.commit()
         return True
         
-    def remove_category(self, product_id: UUID, category_id: UUID) -> bool:
-        pc = self.db_session.query(ProductCategory).filter(
-            and_(ProductCategory.product_id == product_id, ProductCategory.category_id == category_id)
-        ).first()
+    async def remove_category(self, product_id: UUID, category_id: UUID) -> bool:
+        pc = await self._get_product_category(product_id, category_id)
         if pc:
-            self.db_session.delete(pc)
-            self.db_session.commit()
+            await self.db_session.delete(pc)
+            await self.db_session.commit()
             return True
         return False
 
-    def get_products_in_category(self, category_id: UUID, skip: int = 0, limit: int = 100) -> List[Product]:
-        return self.db_session.query(Product).join(
-            ProductCategory,
-            ProductCategory.product_id == Product.id
-        ).filter(ProductCategory.category_id == category_id).offset(skip).limit(limit).all()
\ No newline at end of file
+    async def get_products_in_category(self, category_id: UUID, skip: int = 0, limit: int = 100) -> List[Product]:
+        result = await self.db_session.scalars(
+            select(Product).join(
+                ProductCategory,
+                ProductCategory.product_id == Product.id
+            ).filter(ProductCategory.category_id == category_id).offset(skip).limit(limit)
+        )
+        return list(result.all())
+
+    @staticmethod
+    def _search_query(q: str):
+        # Stemmed to match title and description, verbatim to match SKUs; see Product.search_vector
+        english = func.websearch_to_tsquery(literal_column("'english'"), q)
+        simple = func.websearch_to_tsquery(literal_column("'simple'"), q)
+        return english.op("||")(simple)
+
+    @staticmethod
+    def _has_variation(*criteria):
+        return select(ProductVariation.id).filter(ProductVariation.product_id == Product.id, *criteria).correlate(Product).exists()
+
+    def _search_filters(self, filters: ProductSearchFilters) -> Dict[str, object]:
+        # Keyed by facet, so each facet can be counted without its own filter applied.
+        # Size, colour and price may each be matched by a different variation.
+        clauses = {}
+        if filters.q and filters.q.strip():
+            clauses["q"] = Product.search_vector.bool_op("@@")(self._search_query(filters.q))
+        if filters.category_id:
+            clauses["category"] = Product.id.in_(
+                select(ProductCategory.product_id).filter(ProductCategory.category_id.in_(filters.category_id))
+            )
+        base_price, variation_price = [], []
+        if filters.min_price is not None:
+            min_price = Decimal(str(filters.min_price))
+            base_price.append(Product.base_price >= min_price)
+            variation_price.append(ProductVariation.price >= min_price)
+        if filters.max_price is not None:
+            max_price = Decimal(str(filters.max_price))
+            base_price.append(Product.base_price <= max_price)
+            variation_price.append(ProductVariation.price <= max_price)
+        if base_price:
+            clauses["price"] = or_(and_(*base_price), self._has_variation(*variation_price))
+        if filters.on_sale is not None:
+            clauses["on_sale"] = Product.on_sale.is_(filters.on_sale)
+        if filters.top_sale is not None:
+            clauses["top_sale"] = Product.top_sale.is_(filters.top_sale)
+        if filters.size:
+            clauses["size"] = self._has_variation(ProductVariation.size.in_(filters.size))
+        if filters.color:
+            clauses["color"] = self._has_variation(ProductVariation.color.in_(filters.color))
+        return clauses
+
+    async def search(self, filters: ProductSearchFilters, cursor: Optional[tuple] = None, limit: int = 20) -> tuple[List[Product], Optional[tuple]]:
+        # Paged on (rank, id) by relevance, or on (created_at, id) like the other lists
+        clauses = self._search_filters(filters)
+        if not filters.by_relevance:
+            return await self.get_page(*clauses.values(), cursor=cursor, limit=limit)
+
+        rank = func.ts_rank_cd(Product.search_vector, self._search_query(filters.q), type_=Float)
+        query = select(Product, rank).filter(*clauses.values())
+        if cursor is not None:
+            query = query.filter(tuple_(rank, Product.id) < tuple_(*cursor))
+        result = await self.db_session.execute(query.order_by(rank.desc(), Product.id.desc()).limit(limit + 1))
+        rows = result.all()
+        items = [product for product, _ in rows[:limit]]
+        if len(rows) <= limit:
+            return items, None
+        return items, (rows[limit - 1][1], items[-1].id)
+
+    async def search_facets(self, filters: ProductSearchFilters) -> tuple[int, Dict[str, List[dict]]]:
+        # The total and every facet in one statement. A facet is counted with all filters
+        # but its own, so the other values of a facet in use stay visible with their counts;
+        # facets not filtered on share the matching products, which are looked up once.
+        clauses = self._search_filters(filters)
+        matched = select(Product.id, Product.on_sale, Product.top_sale).filter(*clauses.values()).cte("matched")
+
+        def within(column, facet: Optional[str]) -> list:
+            if not clauses:
+                return []
+            if facet not in clauses:
+                return [column.in_(select(matched.c.id))]
+            others = [clause for key, clause in clauses.items() if key != facet]
+            return [column.in_(select(Product.id).filter(*others))] if others else []
+
+        def counts(facet: str, value, *criteria, count=func.count()):
+            return select(literal(facet).label("facet"), cast(value, String).label("value"), count.label("count")).filter(*criteria).group_by(value)
+
+        def flag_counts(facet: str, column):
+            if facet in clauses:
+                return counts(facet, column, *within(Product.id, facet))
+            return counts(facet, matched.c[facet])
+
+        # Sizes and colours of the matching products are read once for both facets; over
+        # the whole catalogue each is counted straight from its (value, product_id) index
+        variations = select(ProductVariation.product_id, ProductVariation.size, ProductVariation.color).filter(
+            *within(ProductVariation.product_id, None)
+        ).cte("matched_variations")
+
+        def variation_counts(facet: str, column):
+            if facet in clauses or not clauses:
+                return counts(facet, column, column.is_not(None), *within(ProductVariation.product_id, facet),
+                              count=func.count(distinct(ProductVariation.product_id)))
+            return counts(facet, variations.c[facet], variations.c[facet].is_not(None),
+                          count=func.count(distinct(variations.c.product_id)))
+        query = union_all(
+            select(literal("total"), cast(null(), String), func.count()).select_from(matched),
+            counts("category", ProductCategory.category_id, *within(ProductCategory.product_id, "category")),
+            variation_counts("size", ProductVariation.size),
+            variation_counts("color", ProductVariation.color),
+            flag_counts("on_sale", Product.on_sale),
+            flag_counts("top_sale", Product.top_sale),
+        )
+        total, facets = 0, {}
+        for facet, value, count in await self.db_session.execute(query):
+            if facet == "total":
+                total = count
+            else:
+                facets.setdefault(facet, []).append({"value": value, "count": count})
+        for values in facets.values():
+            values.sort(key=lambda item: -item["count"])
+        return total, facets
@@ -1,7 +1,42 @@
 from .base import BaseRepository
-from src.app.models.v1 import ProductVariation
-from sqlalchemy.orm import Session
+from src.app.models.v1 import ProductVariation, ProductImage, Comment
+from uuid import UUID
+from typing import List
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, noload, with_expression
 
 class ProductVariationRepository(BaseRepository[ProductVariation]):
-    def __init__(self, db: Session):
-        super().__init__(ProductVariation, db)
\ No newline at end of file
+    # Images and comments would list their variation again, the same cycle as in their own repositories
+    load_options = (
+        selectinload(ProductVariation.product),
+        selectinload(ProductVariation.images).noload(ProductImage.variation),
+        selectinload(ProductVariation.comments).noload(Comment.variation),
+    )
+    # The listing with ratings sends images only; comments are summed up in SQL instead
+    rating_options = (
+        noload(ProductVariation.product),
+        noload(ProductVariation.comments),
+        selectinload(ProductVariation.images).noload(ProductImage.variation),
+    )
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(ProductVariation, db)
+
+    @staticmethod
+    def rating_expressions() -> tuple:
+        # Correlated per variation, each one a range scan on the comments index
+        comments = select(Comment).filter(Comment.product_variation_id == ProductVariation.id)
+        return (
+            with_expression(ProductVariation.rating_average, comments.with_only_columns(func.avg(Comment.rating)).scalar_subquery()),
+            with_expression(ProductVariation.rating_count, comments.with_only_columns(func.count()).scalar_subquery()),
+        )
+
+    async def get_by_product(self, product_id: UUID, skip: int = 0, limit: int = 100, with_rating: bool = False) -> List[ProductVariation]:
+        query = select(ProductVariation).filter(ProductVariation.product_id == product_id)
+        if with_rating:
+            query = query.options(*self.rating_options, *self.rating_expressions())
+        else:
+            query = query.options(*self.load_options)
+        result = await self.db_session.scalars(query.order_by(ProductVariation.id).offset(skip).limit(limit))
+        return list(result.all())
@@ -1,21 +1,27 @@
-from .product import ProductBase, ProductCreate, Product
-from .product_variation import ProductVariationBase, ProductVariationCreate, ProductVariation
+from .product import ProductBase, ProductCreate, Product, ProductFull, ProductSearchFilters, FacetCount, ProductSearchResult
+from .product_variation import ProductVariationBase, ProductVariationCreate, ProductVariation, ProductVariationWithRating
 from .product_image import ProductImageBase, ProductImageCreate, ProductImage
-from .category import CategoryBase, CategoryCreate, Category
+from .category import CategoryBase, CategoryCreate, CategorySummary, Category
 from .comment import CommentBase, CommentCreate, Comment
 
 __all__ = [
     "ProductBase",
     "ProductCreate",
     "Product",
+    "ProductFull",
+    "ProductSearchFilters",
+    "FacetCount",
+    "ProductSearchResult",
     "ProductVariationBase",
     "ProductVariationCreate",
     "ProductVariation",
+    "ProductVariationWithRating",
     "ProductImageBase",
     "ProductImageCreate",
     "ProductImage",
     "CategoryBase",
     "CategoryCreate",
+    "CategorySummary",
     "Category",
     "ProductCategory",
     "CommentBase",
@@ -9,6 +9,12 @@ class CategoryBase(BaseModel):
 class CategoryCreate(CategoryBase):
     pass
 
+class CategorySummary(CategoryBase):
+    id: UUID
+
+    class Config:
+        from_attributes = True
+
 class Category(CategoryBase):
     id: UUID
 
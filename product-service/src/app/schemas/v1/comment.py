@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field, validator
 from typing import Optional
 from uuid import UUID
@@ -15,7 +16,7 @@ class CommentBaseWithUser(CommentBase):
 
 class Comment(CommentBaseWithUser):
     comment_id: UUID
-    created_at: str
+    created_at: datetime
     is_active: bool = True
 
     variation: Optional["ProductVariation"] = None
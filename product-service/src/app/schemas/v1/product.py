@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 
 from sqlalchemy import DateTime
@@ -43,4 +43,39 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
-    # from .category import Category
\ No newline at end of file
+    # from .category import Category
+
+class ProductSearchFilters(BaseModel):
+    q: Optional[str] = Field(None, max_length=200, description="Words to look for in title, description and SKU")
+    category_id: List[UUID] = []
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    on_sale: Optional[bool] = None
+    top_sale: Optional[bool] = None
+    size: List[str] = []
+    color: List[str] = []
+    sort: Literal["relevance", "newest"] = "relevance"
+
+    @property
+    def by_relevance(self) -> bool:
+        # Without words to rank by, results come newest first
+        return self.sort == "relevance" and bool(self.q and self.q.strip())
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class ProductSearchResult(BaseModel):
+    items: List[Product]
+    # Only on the first page, later pages match the same products
+    total: Optional[int] = None
+    facets: Optional[Dict[str, List[FacetCount]]] = None
+
+class ProductFull(Product):
+    categories: List["CategorySummary"] = []
+    variations: List["ProductVariationWithRating"] = []
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+
+from .category import CategorySummary
+from .product_variation import ProductVariationWithRating  # Circular import resolution
\ No newline at end of file
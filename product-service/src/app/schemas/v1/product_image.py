@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
 from uuid import UUID
@@ -12,7 +13,7 @@ class ProductImageCreate(ProductImageBase):
 
 class ProductImage(ProductImageBase):
     id: UUID
-    created_at: str
+    created_at: datetime
 
     variation: Optional["ProductVariation"] = None
 
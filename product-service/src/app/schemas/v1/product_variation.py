@@ -26,6 +26,16 @@ class ProductVariation(ProductVariationBase):
     class Config:
         from_attributes = True
 
+class ProductVariationWithRating(ProductVariationBase):
+    id: UUID
+
+    images: List["ProductImage"] = []
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+
+    class Config:
+        from_attributes = True
+
 from .product import Product
 from .product_image import ProductImage
 from .comment import Comment  # Circular import resolution
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+import httpx
+import pytest
+from sqlalchemy import delete, event, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.app.main import app
+from src.app.core.db import engine, SessionLocal
+from src.app.models.v1 import Product, ProductVariation, ProductImage, Comment, Category, ProductCategory
+
+# Needs a PostgreSQL database with the schema applied (alembic upgrade head); each
+# test seeds its own product and removes it again. Skipped when there is none.
+
+# Product, categories, variations with their ratings, images; the last is skipped
+# when there are no variations
+EXPECTED_STATEMENTS = 4
+CATEGORIES = 3
+DATABASE_TIMEOUT = 5
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            # Pooled asyncpg connections belong to this event loop
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    async def ping():
+        async with asyncio.timeout(DATABASE_TIMEOUT), SessionLocal() as db:
+            await db.execute(select(Product.id).limit(1))
+
+    try:
+        run(ping())
+    except (OSError, TimeoutError, SQLAlchemyError) as e:
+        pytest.skip(f"no product database with the schema applied: {e}")
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def seed(variations: int, images: int, comments: int):
+    async with SessionLocal() as db:
+        categories = [Category(name=f"Full test {uuid.uuid4()}") for _ in range(CATEGORIES)]
+        product = Product(title="Full test product", base_price=Decimal("19.99"))
+        db.add_all([product, *categories])
+        await db.flush()
+        db.add_all(ProductCategory(product_id=product.id, category_id=category.id) for category in categories)
+        for i in range(variations):
+            variation = ProductVariation(product_id=product.id, size=f"S{i}", price=Decimal("19.99"))
+            db.add(variation)
+            await db.flush()
+            db.add_all(ProductImage(product_variation_id=variation.id, image_url=f"/images/{i}-{j}.jpg") for j in range(images))
+            db.add_all(Comment(product_variation_id=variation.id, user_id=uuid.uuid4(), rating=j % 5 + 1, content="Seeded") for j in range(comments))
+        await db.commit()
+        return product.id, [category.id for category in categories]
+
+
+async def cleanup(product_id, category_ids):
+    async with SessionLocal() as db:
+        variation_ids = select(ProductVariation.id).where(ProductVariation.product_id == product_id)
+        await db.execute(delete(Comment).where(Comment.product_variation_id.in_(variation_ids)))
+        await db.execute(delete(ProductImage).where(ProductImage.product_variation_id.in_(variation_ids)))
+        await db.execute(delete(ProductVariation).where(ProductVariation.product_id == product_id))
+        await db.execute(delete(ProductCategory).where(ProductCategory.product_id == product_id))
+        await db.execute(delete(Product).where(Product.id == product_id))
+        await db.execute(delete(Category).where(Category.id.in_(category_ids)))
+        await db.commit()
+
+
+async def get_full(variations: int, images: int, comments: int):
+    product_id, category_ids = await seed(variations, images, comments)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with count_statements() as statements:
+                response = await client.get(f"/api/products/{product_id}/full")
+        return response, len(statements)
+    finally:
+        await cleanup(product_id, category_ids)
+
+
+# (variations, images per variation, comments per variation)
+@pytest.mark.parametrize("shape", [(1, 1, 1), (5, 3, 10), (25, 4, 40)])
+def test_full_statement_count_does_not_grow(shape):
+    variations, images, comments = shape
+    response, statements = run(get_full(variations, images, comments))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["categories"]) == CATEGORIES
+    assert len(body["variations"]) == variations
+    assert all(len(variation["images"]) == images for variation in body["variations"])
+    assert body["rating_count"] == variations * comments
+    assert statements == EXPECTED_STATEMENTS
+
+
+def test_full_without_variations_skips_images():
+    response, statements = run(get_full(0, 0, 0))
+
+    assert response.status_code == 200
+    assert response.json()["variations"] == []
+    assert response.json()["rating_count"] == 0
+    assert statements == EXPECTED_STATEMENTS - 1
+
+
+def test_full_unknown_product():
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(f"/api/products/{uuid.uuid4()}/full")
+
+    assert run(get()).status_code == 404
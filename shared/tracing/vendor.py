@@ -0,0 +1,46 @@
+# Copies trace_context.py into every service that imports it, next to its tracing module.
+#
+# Run from the repository root after editing shared/tracing/trace_context.py:
+#   python shared/tracing/vendor.py           copy it out
+#   python shared/tracing/vendor.py --check   fail if a service's copy has drifted
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[2]
+SOURCE = Path(__file__).resolve().parent / 'trace_context.py'
+
+TARGETS = [
+    'analytic-service/config',
+    'order-service/order_service/order_service',
+    'product-service/src/app/core',
+    'shop-service/shop_service/shop_service',
+    'shopcart-service/src/shopcart_service/core',
+    'user-service/Core',
+    'wishlist-service/app',
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--check', action='store_true', help='only report copies that differ')
+    args = parser.parse_args()
+
+    source = SOURCE.read_bytes()
+    stale = []
+    for target in TARGETS:
+        path = ROOT / target / SOURCE.name
+        if path.exists() and path.read_bytes() == source:
+            continue
+        stale.append(path.relative_to(ROOT))
+        if not args.check:
+            path.write_bytes(source)
+
+    for path in stale:
+        print(f'{"out of date" if args.check else "updated"}: {path}')
+    return 1 if args.check and stale else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_service.settings')
 django.setup()
 
 from shops.models import ShopOrderItem, Shop
+from shop_service.tracing import traced_consumer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -135,7 +136,7 @@ class OrderItemConsumer:
             # Start consuming
             self.channel.basic_consume(
                 queue=queue_name,
-                on_message_callback=self.handle_order_item_created
+                on_message_callback=traced_consumer(self.handle_order_item_created)
             )
             
             logger.info(f"Started consuming order items from queue: {queue_name}")
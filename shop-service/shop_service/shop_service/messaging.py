@@ -3,6 +3,7 @@ import json
 import os
 import logging
 from dotenv import load_dotenv
+from .tracing import span
 
 
 load_dotenv()
@@ -46,15 +47,17 @@ class RabbitMQPublisher:
                 'is_shop_owner': True
             }
             
-            channel.basic_publish(
-                exchange='shop_events',
-                routing_key='shop.approved',
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                    content_type='application/json'
+            with span('publish shop.approved', 'producer', exchange='shop_events') as current:
+                channel.basic_publish(
+                    exchange='shop_events',
+                    routing_key='shop.approved',
+                    body=json.dumps(message),
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,
+                        content_type='application/json',
+                        headers={'traceparent': current.traceparent}
+                    )
                 )
-            )
             
             logger.info(f"published shop.approved event | user={user_uuid} shop={shop_id}")
             connection.close()
@@ -0,0 +1,61 @@
+import os
+
+import httpx
+from django.db.backends.signals import connection_created
+
+from . import trace_context
+from .trace_context import TRACE_EXPORT_FILE, TRACE_STATEMENT_MAX_LENGTH, current_span, span
+
+# Keeps requests, order-service calls, events and queries in the gateway's trace;
+# TRACE_EXPORT_FILE receives the spans as JSON lines.
+trace_context.SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'shop-service')
+
+
+class TracingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        traceparent = request.headers.get('traceparent')
+        with span(request.method, 'server', traceparent, method=request.method, path=request.path) as current:
+            response = self.get_response(request)
+            if request.resolver_match is not None:
+                current.name = f'{request.method} /{request.resolver_match.route}'
+            current.attributes['status_code'] = response.status_code
+        return response
+
+
+class TracingTransport(httpx.HTTPTransport):
+    # Records a client span for each call and hands its traceparent to the callee
+    def handle_request(self, request):
+        with span(f'{request.method} {request.url.host}', 'client', method=request.method, url=str(request.url)) as current:
+            request.headers['traceparent'] = current.traceparent
+            response = super().handle_request(request)
+            current.attributes['status_code'] = response.status_code
+            return response
+
+
+def traced_consumer(callback):
+    # Continues the publisher's trace for each delivered message
+    def on_message(ch, method, properties, body):
+        traceparent = (properties.headers or {}).get('traceparent')
+        with span(f'consume {method.routing_key}', 'consumer', traceparent, exchange=method.exchange):
+            return callback(ch, method, properties, body)
+    return on_message
+
+
+def _query_span(execute, sql, params, many, context):
+    current = current_span.get()
+    if not TRACE_EXPORT_FILE or current is None or not current.sampled:
+        return execute(sql, params, many, context)
+    with span('db.query', 'client', statement=sql[:TRACE_STATEMENT_MAX_LENGTH], many=many):
+        return execute(sql, params, many, context)
+
+
+def _install_query_span(sender, connection, **kwargs):
+    # Fires on every reconnect of the same wrapper, so only add it once
+    if _query_span not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_span)
+
+
+connection_created.connect(_install_query_span)
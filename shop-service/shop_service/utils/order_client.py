@@ -2,6 +2,7 @@ import httpx
 import os
 import logging
 from typing import Optional, Dict, Any
+from shop_service.tracing import TracingTransport
 
 logger = logging.getLogger('shop_service')
 
@@ -29,7 +30,7 @@ class OrderServiceClient:
                 'status': status
             }
             
-            with httpx.Client(timeout=self.timeout) as client:
+            with httpx.Client(timeout=self.timeout, transport=TracingTransport()) as client:
                 response = client.patch(url, json=data, headers=headers)
                 
                 if response.status_code == 200:
@@ -1,11 +1,13 @@
 from fastapi import FastAPI
 from src.shopcart_service.core.db import Base, engine
 from src.shopcart_service.api.v1 import routes as routes_v1
+from src.shopcart_service.core.tracing import tracing_middleware
 
 # Initialize database
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Shopcart Service")
+app.middleware("http")(tracing_middleware)
 
 app.include_router(routes_v1.router, prefix="", tags=["Cart v1"])
 
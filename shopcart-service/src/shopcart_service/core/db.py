@@ -1,12 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from src.shopcart_service.core.config import get_settings
+from src.shopcart_service.core.tracing import trace_engine
 
 settings = get_settings()
 
 DATABASE_URL = settings.DATABASE_URL
 
 engine = create_engine(settings.DATABASE_URL, future=True)
+trace_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
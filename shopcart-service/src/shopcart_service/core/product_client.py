@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 from uuid import UUID
 
+from src.shopcart_service.core.tracing import TracingTransport
+
 load_dotenv() 
 
 PRODUCT_SERVICE = os.getenv('PRODUCT_SERVICE')
@@ -20,7 +22,7 @@ class ProductServiceDataCheck:
         try:
             url = f'{self.base_url}/api/products/variations/{str(variation_id)}'
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=TracingTransport()) as client:
                 response = await client.get(url)
                 
                 if response.status_code == 404:
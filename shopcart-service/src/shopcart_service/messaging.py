@@ -5,6 +5,7 @@ import time
 from sqlalchemy.orm import Session
 from . import crud, models
 from .core.db import SessionLocal
+from .core.tracing import traced_consumer
 
 
 class RabbitMQConsumer:
@@ -208,7 +209,7 @@ class RabbitMQConsumer:
                 # Start consuming
                 channel.basic_consume(
                     queue=queue_name,
-                    on_message_callback=self.callback
+                    on_message_callback=traced_consumer(self.callback)
                 )
                 
                 print('🎧 Waiting for messages (user.created, order.created, shop.approved). To exit press CTRL+C')
@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Core.settings')
 django.setup()
 
 from django.contrib.auth import get_user_model
+from Core.tracing import traced_consumer
 
 User = get_user_model()
 logger = logging.getLogger("user_events")
@@ -111,7 +112,7 @@ class ShopEventConsumer:
                 channel.basic_qos(prefetch_count=1)
                 channel.basic_consume(
                     queue=queue_name,
-                    on_message_callback=self.callback
+                    on_message_callback=traced_consumer(self.callback)
                 )
                 
                 logger.info("User service listening for shop.approved events…")
@@ -3,6 +3,8 @@ import json
 import os
 from django.conf import settings
 
+from .tracing import span
+
 
 class RabbitMQPublisher:
     def __init__(self):
@@ -40,15 +42,17 @@ class RabbitMQPublisher:
                 'is_active': is_active
             }
             
-            channel.basic_publish(
-                exchange='user_events',
-                routing_key='user.created',
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Make message persistent
-                    content_type='application/json'
+            with span('publish user.created', 'producer', exchange='user_events') as current:
+                channel.basic_publish(
+                    exchange='user_events',
+                    routing_key='user.created',
+                    body=json.dumps(message),
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,  # Make message persistent
+                        content_type='application/json',
+                        headers={'traceparent': current.traceparent}
+                    )
                 )
-            )
             
             print(f" Published user.created event for {user_uuid}")
             connection.close()
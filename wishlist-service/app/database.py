@@ -1,11 +1,13 @@
 from sqlmodel import SQLModel, create_engine, Session
 from app.config import DATABASE_URL
+from app.tracing import trace_engine
 
 
 assert DATABASE_URL is not None
 
 # Database Engine
 engine = create_engine(DATABASE_URL, echo=True)
+trace_engine(engine)
 
 def create_db_and_tables():
     """Create all database tables"""
@@ -7,6 +7,7 @@ from app.config import PROJECT_NAME, API_V1_STR
 from app.api.v1.endpoints import wishlist
 
 from app.rabbitmq.connection import rabbitmq_connection
+from app.tracing import tracing_middleware
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +21,8 @@ app = FastAPI(
     version="1.0.0",
 )
 
+app.middleware("http")(tracing_middleware)
+
 # Include routers
 app.include_router(wishlist.router, prefix=API_V1_STR)
 
@@ -3,6 +3,8 @@ import os
 from typing import Optional
 from fastapi import HTTPException, status
 
+from app.tracing import TracingTransport
+
 
 PRODUCT_SERVICE_URL = os.getenv('PRODUCT_SERVICE_URL', 'http://fastapi_app:8000')
 
@@ -15,7 +17,7 @@ class ProductServiceDataCheck:
     async def get_product_data_by_variation_id(self, product_var_id: str) -> Optional[dict]:
         try:
             url = f'{self.base_url}/api/products/variations/{product_var_id}'
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=TracingTransport()) as client:
                 response = await client.get(
                     url,
                     headers={'Content-Type': 'application/json'}
@@ -7,6 +7,7 @@ from app.rabbitmq.connection import rabbitmq_connection
 from app.rabbitmq.schemas import UserCreatedEvent
 from app.database import engine
 from app.models import Wishlist
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,9 @@ class EventConsumer:
         try:
             async with rabbitmq_connection.user_events_queue.iterator() as queue_iter:
                 async for message in queue_iter:
-                    await self._process_user_created_event(message) # type: ignore
+                    traceparent = (message.headers or {}).get("traceparent")
+                    with span(f"consume {message.routing_key}", "consumer", traceparent, exchange=message.exchange):
+                        await self._process_user_created_event(message) # type: ignore
                     
         except Exception as e:
             logger.error(f"Error in consumer: {str(e)}")
@@ -5,6 +5,7 @@ from aio_pika import Message, DeliveryMode
 
 from app.rabbitmq.connection import rabbitmq_connection
 from app.rabbitmq.schemas import WishlistCreatedEvent, WishlistDeletedEvent
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -30,21 +31,22 @@ class EventPublisher:
             
             message_body = event.model_dump_json()
             
-            message = Message(
-                body=message_body.encode(),
-                delivery_mode=DeliveryMode.PERSISTENT,
-                content_type="application/json",
-                headers={
-                    "event_type": "wishlist.created",
-                    "source": "wishlist_service"
-                }
-            )
-            
             if rabbitmq_connection.wishlist_exchange:
-                await rabbitmq_connection.wishlist_exchange.publish(
-                    message=message,
-                    routing_key="wishlist.created"
-                )
+                with span("publish wishlist.created", "producer", exchange=rabbitmq_connection.wishlist_exchange.name) as current:
+                    message = Message(
+                        body=message_body.encode(),
+                        delivery_mode=DeliveryMode.PERSISTENT,
+                        content_type="application/json",
+                        headers={
+                            "event_type": "wishlist.created",
+                            "source": "wishlist_service",
+                            "traceparent": current.traceparent,
+                        }
+                    )
+                    await rabbitmq_connection.wishlist_exchange.publish(
+                        message=message,
+                        routing_key="wishlist.created"
+                    )
                 logger.info(f"Published wishlist.created event for wishlist_id={wishlist_id}")
             else:
                 logger.error("Wishlist exchange is not initialized")
@@ -67,21 +69,22 @@ class EventPublisher:
             
             message_body = event.model_dump_json()
             
-            message = Message(
-                body=message_body.encode(),
-                delivery_mode=DeliveryMode.PERSISTENT,
-                content_type="application/json",
-                headers={
-                    "event_type": "wishlist.deleted",
-                    "source": "wishlist_service"
-                }
-            )
-            
             if rabbitmq_connection.wishlist_exchange:
-                await rabbitmq_connection.wishlist_exchange.publish(
-                    message=message,
-                    routing_key="wishlist.deleted"
-                )
+                with span("publish wishlist.deleted", "producer", exchange=rabbitmq_connection.wishlist_exchange.name) as current:
+                    message = Message(
+                        body=message_body.encode(),
+                        delivery_mode=DeliveryMode.PERSISTENT,
+                        content_type="application/json",
+                        headers={
+                            "event_type": "wishlist.deleted",
+                            "source": "wishlist_service",
+                            "traceparent": current.traceparent,
+                        }
+                    )
+                    await rabbitmq_connection.wishlist_exchange.publish(
+                        message=message,
+                        routing_key="wishlist.deleted"
+                    )
                 logger.info(f"Published wishlist.deleted event for wishlist_id={wishlist_id}")
             else:
                 logger.error("Wishlist exchange is not initialized")
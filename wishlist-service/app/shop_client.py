@@ -3,6 +3,8 @@ import os
 from typing import Optional
 from fastapi import HTTPException, status
 
+from app.tracing import TracingTransport
+
 
 SHOP_SERVICE_URL = os.getenv('SHOP_SERVICE_URL', 'http://shop-service-web-1:8000')
 
@@ -15,7 +17,7 @@ class ShopServiceDataCheck:
     async def get_shop_data(self, shop_id: str) -> Optional[dict]:
         try:
             url = f'{self.base_url}/api/shops/{shop_id}/'
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=TracingTransport()) as client:
                 response = await client.get(
                     url,
                     headers={'Content-Type': 'application/json'}
@@ -0,0 +1,104 @@
+# W3C trace context shared by every service behind the gateway: traceparent parsing
+# and formatting, spans and their export. Services vendor this file next to their
+# tracing module; the canonical copy is shared/tracing/trace_context.py, and
+# `python shared/tracing/vendor.py` copies it out again after an edit.
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Each service's tracing module replaces this with its own name as the default
+SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'unknown-service')
+TRACE_EXPORT_FILE = os.getenv('TRACE_EXPORT_FILE')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1.0))
+TRACE_STATEMENT_MAX_LENGTH = int(os.getenv('TRACE_STATEMENT_MAX_LENGTH', 1000))
+# Only the gateway and the other services send traceparent here, always as version 00.
+# The gateway validates whatever clients send before it gets this far.
+TRACEPARENT = re.compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})')
+
+current_span = ContextVar('current_span', default=None)
+
+span_logger = logging.getLogger('tracing')
+span_logger.setLevel(logging.INFO)
+span_logger.propagate = False
+
+if TRACE_EXPORT_FILE:
+    span_queue = queue.SimpleQueue()
+    span_listener = QueueListener(span_queue, logging.FileHandler(TRACE_EXPORT_FILE))
+    span_listener.start()
+    atexit.register(span_listener.stop)
+    span_logger.addHandler(QueueHandler(span_queue))
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'sampled', 'attributes', 'start', '_started')
+
+    def __init__(self, name, kind, trace_id, parent_id, sampled, attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def end(self):
+        if not self.sampled or not TRACE_EXPORT_FILE:
+            return
+        span_logger.info(json.dumps({
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'service': SERVICE_NAME,
+            'start': self.start,
+            'duration_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'attributes': self.attributes,
+        }, default=str))
+
+
+def start_span(name, kind='internal', traceparent=None, **attributes):
+    # A valid traceparent starts the span under the caller's; otherwise it is a child of
+    # the current span, or the root of a new trace
+    parent = TRACEPARENT.fullmatch(traceparent) if traceparent else None
+    current = current_span.get()
+    if parent is not None:
+        trace_id, parent_id, flags = parent.groups()
+        sampled = bool(int(flags, 16) & 1)
+    elif current is not None:
+        trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+    else:
+        trace_id, parent_id, sampled = os.urandom(16).hex(), None, random.random() < TRACE_SAMPLE_RATE
+    return Span(name, kind, trace_id, parent_id, sampled, attributes)
+
+
+@contextmanager
+def span(name, kind='internal', traceparent=None, **attributes):
+    current = start_span(name, kind, traceparent, **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.attributes['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        current_span.reset(token)
+        current.end()